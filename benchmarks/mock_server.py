@@ -0,0 +1,440 @@
+"""Local stand-in for the Whatnot API serving canned responses
+
+Run it on its own with `python -m benchmarks.mock_server --port 8080`, or
+start it in-process with `MockServer`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from base64 import b64encode
+from hashlib import sha256
+from typing import Any, Dict, Optional, Union
+
+from aiohttp import WSMsgType, web
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    parse,
+    value_from_ast_untyped,
+)
+
+
+def encode_id(type_: str, id_: Any) -> str:
+    return b64encode(f"{type_}:{id_}".encode("utf-8")).decode("utf-8")
+
+
+def user_payload(id_: Any) -> dict:
+    id_ = str(id_)
+
+    return {
+        "__typename": "PublicUserNode",
+        "id": encode_id("UserNode", id_),
+        "username": f"seller{id_}",
+        "userFollowing": False,
+        "followerCount": 1200,
+        "followingCount": 85,
+        "averageShipDays": 3,
+        "isVerifiedSeller": True,
+        "canBeMessagedByMe": True,
+        "profileImage": {
+            "__typename": "Image",
+            "id": encode_id("ImageNode", id_),
+            "bucket": "whatnot-images",
+            "key": f"users/{id_}/profile.jpg",
+        },
+        "bio": "Cards, comics and collectibles. Live every night!",
+        "soldCount": 5400,
+        "sellerRating": {"__typename": "Rating", "overall": 4.9, "numReviews": 812},
+    }
+
+
+def live_payload(id_: Any, user_id: Any = 1, status: str = "PLAYING") -> dict:
+    id_ = str(id_)
+
+    return {
+        "__typename": "LiveStream",
+        "id": id_,
+        "status": status,
+        "trailerUrl": None,
+        "trailerThumbnailUrl": f"https://images.whatnot.com/trailers/{id_}.jpg",
+        "title": f"Mystery packs and giveaways #{id_}",
+        "startTime": "1689000000000",
+        "pinnedProductId": None,
+        "activeViewers": 240,
+        "categories": ["trading_cards", "pokemon_cards"],
+        "categoryNodes": [
+            {"__typename": "CategoryNode", "id": "cat1", "label": "Trading Cards"},
+            {"__typename": "CategoryNode", "id": "cat2", "label": "Pokémon Cards"},
+        ],
+        "totalWatchlistUsers": 57,
+        "isSellerInternationalToBuyer": False,
+        "streamToken": "token",
+        "user": user_payload(user_id),
+        "isUserBanned": False,
+        "isUserModerator": False,
+        "nominatedModerators": [{"__typename": "PublicUserNode", "id": "mod1"}],
+        "explicitContent": False,
+        "isHiddenBySeller": False,
+    }
+
+
+def event_payload(live_id: str, i: int) -> dict:
+    user = {
+        "__typename": "PublicUserNode",
+        "id": encode_id("UserNode", i),
+        "username": f"buyer{i}",
+    }
+
+    return [
+        {
+            "__typename": "ChatMessage",
+            "id": f"{live_id}-{i}",
+            "message": "Let's go!",
+            "createdAt": int(time.time() * 1000),
+            "user": user,
+        },
+        {
+            "__typename": "Bid",
+            "id": f"{live_id}-{i}",
+            "productId": f"{live_id}-product",
+            "amount": {"__typename": "Money", "amount": i, "currency": "USD"},
+            "user": user,
+        },
+        {"__typename": "PinnedProductUpdate", "productId": f"{live_id}-product{i}"},
+        {"__typename": "ViewerCountUpdate", "activeViewers": 100 + i},
+    ][i % 4]
+
+
+def connection(nodes: list, first: Optional[int], after: Optional[str]) -> dict:
+    """Slice nodes into a relay-style connection page"""
+    start = int(after) if after else 0
+    end = start + first if first else len(nodes)
+
+    return {
+        "__typename": "Connection",
+        "totalCount": len(nodes),
+        "pageInfo": {
+            "__typename": "PageInfo",
+            "startCursor": str(start),
+            "endCursor": str(min(end, len(nodes))),
+            "hasNextPage": end < len(nodes),
+            "hasPreviousPage": start > 0,
+        },
+        "edges": [
+            {"__typename": "Edge", "cursor": str(i), "node": node}
+            for i, node in enumerate(nodes[start:end], start)
+        ],
+    }
+
+
+class MockServer:
+    """Serves `getUser`, `liveStream`, `searchLivestreams` and `forYou`
+    queries plus the REST auth endpoints, waiting `latency` seconds before
+    each response, and supporting automatic persisted queries unless
+    `persisted_queries` is False
+
+    WebSocket connections to the GraphQL endpoint speak graphql-transport-ws,
+    sending every subscribed livestream an event every `event_interval`
+    seconds, cycling through chat, bid, pinned product and viewer events.
+
+    Responses only contain the fields selected by the query, so payload
+    sizes match what the real API would send.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        lives_per_user: int = 200,
+        event_interval: float = 0.1,
+        persisted_queries: bool = True,
+    ) -> None:
+        self.latency = latency
+        self.lives_per_user = lives_per_user
+        self.event_interval = event_interval
+        self.requests = 0
+        self.received_bytes = 0
+
+        # Automatic persisted queries by sha256 hash
+        self.persisted_queries = persisted_queries
+        self.persisted: Dict[str, str] = {}
+        self.subscriptions = 0
+        self.websockets: set = set()
+
+        self.app = web.Application()
+        self.app.router.add_post("/graphql/", self.graphql)
+        self.app.router.add_get("/graphql/", self.websocket)
+        self.app.router.add_post("/api/v2/login", self.login)
+        self.app.router.add_post("/api/v2/verify", self.login)
+        self.app.router.add_post("/api/v2/refresh", self.login)
+
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    @property
+    def gql_url(self) -> str:
+        return f"{self.url}/graphql/"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/api/v2"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "MockServer":
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+
+        return self
+
+    async def close(self) -> None:
+        for ws in list(self.websockets):
+            await ws.close()
+
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def __aenter__(self) -> "MockServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    """Handlers"""
+
+    async def login(self, request: web.Request) -> web.Response:
+        self.requests += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        now = int(time.time())
+
+        return web.json_response(
+            {
+                "user_id": "1",
+                "access_token": {"token": f"access-{now}", "expires_in": 3600},
+                "refresh_token": {"token": f"refresh-{now}", "expires_in": 86400},
+            }
+        )
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        raw = await request.read()
+        self.received_bytes += len(raw)
+        body = json.loads(raw)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        query = self.persisted_query(body)
+        if isinstance(query, dict):
+            return web.json_response(query)
+
+        document = parse(query)
+        variables = body.get("variables") or {}
+
+        fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        operation = next(
+            definition
+            for definition in document.definitions
+            if isinstance(definition, OperationDefinitionNode)
+        )
+
+        data = {}
+        for field in operation.selection_set.selections:
+            args = {
+                arg.name.value: value_from_ast_untyped(arg.value, variables)
+                for arg in field.arguments
+            }
+            value = self.resolve(field.name.value, args)
+            key = field.alias.value if field.alias else field.name.value
+            data[key] = project(value, field.selection_set, fragments)
+
+        return web.json_response({"data": data})
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=("graphql-transport-ws",))
+        await ws.prepare(request)
+        self.websockets.add(ws)
+
+        tasks = {}
+
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+
+                message = json.loads(message.data)
+                type_ = message.get("type")
+
+                if type_ == "connection_init":
+                    await ws.send_json({"type": "connection_ack"})
+                elif type_ == "ping":
+                    await ws.send_json({"type": "pong"})
+                elif type_ == "subscribe":
+                    self.subscriptions += 1
+                    live_id = message["payload"]["variables"]["livestreamId"]
+                    tasks[message["id"]] = asyncio.create_task(
+                        self.publish(ws, message["id"], live_id)
+                    )
+                elif type_ == "complete" and message["id"] in tasks:
+                    tasks.pop(message["id"]).cancel()
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+            self.websockets.discard(ws)
+
+        return ws
+
+    async def publish(self, ws: web.WebSocketResponse, id_: str, live_id: str) -> None:
+        for i in itertools.count():
+            await asyncio.sleep(self.event_interval)
+            await ws.send_json(
+                {
+                    "id": id_,
+                    "type": "next",
+                    "payload": {
+                        "data": {"liveStreamEvents": event_payload(live_id, i)}
+                    },
+                }
+            )
+
+    def persisted_query(self, body: dict) -> Union[str, dict]:
+        """Get the query of a request, following the automatic persisted
+        queries protocol, or the error response to send"""
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+
+        if not persisted:
+            return body["query"]
+
+        if not self.persisted_queries:
+            return {
+                "errors": [
+                    {
+                        "message": "PersistedQueryNotSupported",
+                        "extensions": {"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+                    }
+                ]
+            }
+
+        hash_ = persisted["sha256Hash"]
+
+        if "query" in body:
+            if sha256(body["query"].encode("utf-8")).hexdigest() != hash_:
+                return {"errors": [{"message": "provided sha does not match query"}]}
+
+            self.persisted[hash_] = body["query"]
+            return body["query"]
+
+        if hash_ not in self.persisted:
+            return {
+                "errors": [
+                    {
+                        "message": "PersistedQueryNotFound",
+                        "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+                    }
+                ]
+            }
+
+        return self.persisted[hash_]
+
+    def resolve(self, field: str, args: dict) -> Any:
+        if field == "getUser":
+            return user_payload(args.get("id") or args.get("username"))
+
+        if field == "liveStream":
+            return live_payload(args["id"])
+
+        if field == "searchLivestreams":
+            user_id = (args.get("userIds") or [1])[0]
+            lives = [
+                live_payload(f"{user_id}-{i}", user_id, "ENDED")
+                for i in range(self.lives_per_user)
+            ]
+            return connection(lives, args.get("first"), args.get("after"))
+
+        if field == "forYou":
+            sections = [
+                {
+                    "__typename": "FeedSection",
+                    "id": f"section{i}",
+                    "title": f"Section {i}",
+                    "sectionStyle": "ROW",
+                    "sectionContentStyle": "LIVESTREAM",
+                    "feed": {"__typename": "Feed", "id": f"feed{i}", "title": "Feed"},
+                    "contents": connection(
+                        [live_payload(f"fy{i}-{j}", j) for j in range(10)], None, None
+                    ),
+                }
+                for i in range(20)
+            ]
+            return {
+                "__typename": "ForYou",
+                "id": "forYou",
+                "title": "For You",
+                "sections": connection(sections, args.get("first"), args.get("after")),
+            }
+
+        return None
+
+
+def project(value: Any, selection_set, fragments: dict) -> Any:
+    """Keep only the fields selected by a selection set"""
+    if selection_set is None or value is None:
+        return value
+
+    if isinstance(value, list):
+        return [project(item, selection_set, fragments) for item in value]
+
+    result = {}
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            key = selection.alias.value if selection.alias else selection.name.value
+            result[key] = project(
+                value.get(selection.name.value), selection.selection_set, fragments
+            )
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments[selection.name.value]
+            result.update(project(value, fragment.selection_set, fragments))
+        elif isinstance(selection, InlineFragmentNode):
+            type_condition = selection.type_condition
+            if type_condition is None or type_condition.name.value == value.get(
+                "__typename"
+            ):
+                result.update(project(value, selection.selection_set, fragments))
+
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = await MockServer(latency=args.latency).start(args.host, args.port)
+    print(f"Serving on {server.url} (gql_url={server.gql_url})")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,215 @@
+"""Benchmarks for the Whatnot client against a local mock server
+
+Usage: python -m benchmarks.run [--requests N] [--concurrency N]
+                                [--latency SECONDS] [--output results.json]
+
+Each scenario reports requests/sec, latency percentiles and peak memory
+(measured with tracemalloc in a separate, untimed pass). Results are saved
+as JSON so they can be compared between releases.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from whatnot import Whatnot
+from whatnot.types import LiveStream, User
+
+from .mock_server import MockServer, live_payload, user_payload
+
+
+def percentiles(latencies: list) -> dict:
+    latencies = sorted(latencies)
+
+    def at(p: float) -> float:
+        return latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)]
+
+    return {
+        "p50": at(50),
+        "p95": at(95),
+        "p99": at(99),
+        "max": latencies[-1],
+        "mean": sum(latencies) / len(latencies),
+    }
+
+
+async def run_requests(
+    call: Callable[[int], Awaitable], requests: int, concurrency: int
+) -> dict:
+    """Make `requests` calls with `concurrency` workers, timing each one"""
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "requests_per_second": requests / elapsed,
+        "latency": percentiles(latencies),
+    }
+
+
+async def peak_memory(
+    call: Callable[[int], Awaitable], requests: int, concurrency: int
+) -> int:
+    """Peak traced memory in bytes while making the calls"""
+    tracemalloc.start()
+
+    try:
+        await run_requests(call, requests, concurrency)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_models(count: int) -> dict:
+    """Time building models from canned payloads and reading common fields
+
+    Memory is traced from building the payloads onward, so it is what the
+    models retain including their raw data, as when parsing a response.
+    """
+
+    def lives() -> list:
+        return [live_payload(i, i % 500) for i in range(count)]
+
+    def users() -> list:
+        return [user_payload(i) for i in range(count)]
+
+    results = {}
+
+    for name, payloads, build in (
+        ("LiveStream", lives, lambda data: [LiveStream(i) for i in data]),
+        ("User", users, lambda data: [User(i) for i in data]),
+        (
+            "LiveStream.fields",
+            lives,
+            lambda data: [
+                (i.id, i.title, i.status, i.start_time, i.user.id)
+                for i in map(LiveStream, data)
+            ],
+        ),
+    ):
+        data = payloads()
+        start = time.perf_counter()
+        build(data)
+        elapsed = time.perf_counter() - start
+        del data
+
+        tracemalloc.start()
+        kept = build(payloads())
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+
+        results[name] = {
+            "count": count,
+            "elapsed": elapsed,
+            "per_second": count / elapsed,
+            "memory": memory,
+            "memory_per_object": memory / count,
+        }
+
+    return results
+
+
+async def main(args: argparse.Namespace) -> dict:
+    server = await MockServer(latency=args.latency).start()
+
+    try:
+        async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as whatnot:
+            scenarios = {
+                "get_user": lambda i: whatnot.get_user(f"seller{i}"),
+                "get_live": lambda i: whatnot.get_live(str(i)),
+                "get_user_lives": lambda i: whatnot.get_user_lives(
+                    str(i), first=args.page_size
+                ),
+            }
+
+            results = {}
+            for name, call in scenarios.items():
+                if args.only and name not in args.only:
+                    continue
+
+                # Warm up connections and query parsing
+                await run_requests(call, args.concurrency, args.concurrency)
+
+                results[name] = await run_requests(
+                    call, args.requests, args.concurrency
+                )
+                results[name]["peak_memory"] = await peak_memory(
+                    call, args.requests, args.concurrency
+                )
+
+                print(
+                    f"{name}: {results[name]['requests_per_second']:.0f} req/s, "
+                    f"p50 {results[name]['latency']['p50'] * 1000:.2f}ms, "
+                    f"p99 {results[name]['latency']['p99'] * 1000:.2f}ms"
+                )
+    finally:
+        await server.close()
+
+    if not args.only or "models" in args.only:
+        results["models"] = bench_models(args.models)
+
+        for name, result in results["models"].items():
+            print(
+                f"models.{name}: {result['per_second']:.0f}/s, "
+                f"{result['memory_per_object']:.0f} bytes/object"
+            )
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock server latency in seconds"
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=50, help="first= for get_user_lives"
+    )
+    parser.add_argument(
+        "--models", type=int, default=10000, help="Models to build per model bench"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        help="Scenarios to run (get_user, get_live, get_user_lives, models)",
+    )
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
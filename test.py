@@ -22,8 +22,12 @@ async def general():
     lives = await whatnot.get_user_lives(user_id)
 
     # Test getting a single live
-    for l in [live.id for live in lives]:
-        await whatnot.get_live(l)
+    if lives:
+        await whatnot.get_live(lives[0].id)
+
+    # Test getting lives in bulk
+    results = await whatnot.get_lives([live.id for live in lives])
+    assert not results.errors, results.errors
 
 
 async def main():
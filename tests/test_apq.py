@@ -0,0 +1,66 @@
+import asyncio
+
+from benchmarks.mock_server import MockServer
+from whatnot import Whatnot
+
+
+async def get_users(server: MockServer, count: int = 3, **kwargs) -> Whatnot:
+    async with Whatnot(
+        gql_url=server.gql_url, api_url=server.api_url, persisted_queries=True, **kwargs
+    ) as whatnot:
+        for i in range(count):
+            user = await whatnot.get_user(f"user{i}")
+            assert user.username == f"selleruser{i}"
+
+        return whatnot
+
+
+def test_query_text_is_sent_once():
+    async def main():
+        async with MockServer() as server:
+            whatnot = await get_users(server)
+
+            # The first request is retried with the text, the rest send the hash
+            assert whatnot.transport.misses == 1
+            assert whatnot.transport.hits == 2
+            assert server.requests == 4
+            assert len(server.persisted) == 1
+
+    asyncio.run(main())
+
+
+def test_hashes_known_to_the_server_are_hits():
+    async def main():
+        async with MockServer() as server:
+            await get_users(server, 1)
+            whatnot = await get_users(server, 2)
+
+            assert whatnot.transport.misses == 0
+            assert whatnot.transport.hits == 2
+
+    asyncio.run(main())
+
+
+def test_server_without_persisted_queries():
+    async def main():
+        async with MockServer(persisted_queries=False) as server:
+            whatnot = await get_users(server)
+
+            # Only the first request is tried with a hash
+            assert not whatnot.transport.enabled
+            assert server.requests == 4
+            assert not server.persisted
+
+    asyncio.run(main())
+
+
+def test_hashes_are_smaller_than_queries():
+    async def main():
+        async with MockServer() as server:
+            await get_users(server, 1)
+            received = server.received_bytes
+            await get_users(server, 1)
+
+            assert server.received_bytes - received < received / 2
+
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+import asyncio
+
+from aiohttp import web
+
+from benchmarks.mock_server import MockServer
+from whatnot import Whatnot
+
+
+class MalformedServer(MockServer):
+    """Mock server whose first event of each stream is `first`, a raw frame"""
+
+    def __init__(self, first: str) -> None:
+        super().__init__(event_interval=0.01)
+        self.first = first
+
+    async def publish(self, ws: web.WebSocketResponse, id_: str, live_id: str) -> None:
+        await ws.send_str(self.first.replace("ID", id_))
+        await super().publish(ws, id_, live_id)
+
+
+async def take(iterator, count: int) -> list:
+    events = []
+
+    async for event in iterator:
+        events.append(event)
+
+        if len(events) == count:
+            break
+
+    return events
+
+
+def test_events_of_every_stream():
+    async def main():
+        async with MockServer(event_interval=0.01) as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                async with w.live_subscriptions() as subscriptions:
+                    for i in range(3):
+                        await subscriptions.subscribe(f"live{i}")
+
+                    events = await asyncio.wait_for(take(subscriptions, 30), 5)
+
+                    assert {event.live_id for event in events} == {
+                        "live0",
+                        "live1",
+                        "live2",
+                    }
+                    assert {event.kind for event in events} == {
+                        "chat",
+                        "bid",
+                        "pinned_product",
+                        "viewers",
+                    }
+                    assert server.subscriptions == 3
+                    assert len(server.websockets) == 1
+
+    asyncio.run(main())
+
+
+def test_read_one_stream_until_unsubscribed():
+    async def main():
+        async with MockServer(event_interval=0.01) as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                async with w.live_subscriptions() as subscriptions:
+                    streams = [
+                        await subscriptions.subscribe(f"live{i}") for i in range(3)
+                    ]
+
+                    for stream in streams:
+                        events = await asyncio.wait_for(take(stream, 10), 5)
+                        assert {event.live_id for event in events} == {stream.live_id}
+
+                    # Each stream waits in the ready queue at most once
+                    assert len(subscriptions._ready) <= len(streams)
+
+                    await subscriptions.unsubscribe("live0")
+                    await asyncio.wait_for(take(streams[0], 1000), 5)
+                    assert streams[0].closed
+
+    asyncio.run(main())
+
+
+def test_small_queue_drops_oldest_events():
+    async def main():
+        async with MockServer(event_interval=0.001) as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                async with w.live_subscriptions(queue_size=5) as subscriptions:
+                    stream = await subscriptions.subscribe("live0")
+                    await asyncio.sleep(0.2)
+
+                    assert stream.queue.qsize() == 5
+                    assert stream.dropped > 0
+
+    asyncio.run(main())
+
+
+def test_malformed_event_is_delivered_as_an_error():
+    frame = (
+        '{"id": "ID", "type": "next", '
+        '"payload": {"data": {"liveStreamEvents": ["oops"]}}}'
+    )
+
+    async def main():
+        async with MalformedServer(frame) as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                async with w.live_subscriptions() as subscriptions:
+                    stream = await subscriptions.subscribe("live0")
+                    events = await asyncio.wait_for(take(stream, 3), 5)
+
+                    assert events[0].kind == "error"
+                    assert events[1].kind == "chat"
+
+    asyncio.run(main())
+
+
+def test_undecodable_message_ends_streams_without_reconnect():
+    async def main():
+        async with MalformedServer("not json") as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                subscriptions = w.live_subscriptions(reconnect=False)
+                await subscriptions.connect()
+                stream = await subscriptions.subscribe("live0")
+
+                events = await asyncio.wait_for(take(stream, 1000), 5)
+                assert [event.kind for event in events] == ["error"]
+                assert await asyncio.wait_for(take(subscriptions, 1000), 5) == []
+
+                await subscriptions.close()
+
+    asyncio.run(main())
+
+
+def test_reconnects_and_resubscribes():
+    async def main():
+        async with MockServer(event_interval=0.01) as server:
+            async with Whatnot(gql_url=server.gql_url, api_url=server.api_url) as w:
+                async with w.live_subscriptions() as subscriptions:
+                    stream = await subscriptions.subscribe("live0")
+                    await asyncio.wait_for(take(stream, 1), 5)
+
+                    for ws in list(server.websockets):
+                        await ws.close()
+
+                    await asyncio.sleep(1)
+                    while not stream.queue.empty():
+                        stream.queue.get_nowait()
+
+                    await asyncio.wait_for(take(stream, 1), 5)
+                    assert subscriptions.reconnects == 1
+                    assert server.subscriptions == 2
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from benchmarks.mock_server import MockServer
+from whatnot import Whatnot
+from whatnot.exc import AuthenticationFailed
+
+
+class RefreshServer(MockServer):
+    """Mock server counting refreshes, optionally rejecting the refresh token"""
+
+    def __init__(self, reject: bool = False) -> None:
+        super().__init__()
+        self.reject = reject
+        self.refreshes = 0
+
+    async def login(self, request: web.Request) -> web.Response:
+        if request.path.endswith("/refresh"):
+            self.refreshes += 1
+
+            # Long enough for concurrent callers to queue on the lock
+            await asyncio.sleep(0.05)
+
+            if self.reject:
+                return web.json_response({"message": "Invalid token"}, status=401)
+
+        return await super().login(request)
+
+
+async def logged_in(server: MockServer, **kwargs) -> Whatnot:
+    whatnot = Whatnot(gql_url=server.gql_url, api_url=server.api_url, **kwargs)
+    await whatnot.login("user@example.com", "password")
+    return whatnot
+
+
+def test_concurrent_requests_share_one_refresh():
+    async def main():
+        async with RefreshServer() as server:
+            whatnot = await logged_in(server, auto_refresh=False)
+
+            async with whatnot:
+                whatnot.access_data["refresh_token"]["token"] = "refresh-old"
+                whatnot.access_data["access_token"]["token"] = "access-old"
+                whatnot.access_data["access_token"]["expires_at"] = time.time() - 1
+
+                await asyncio.gather(*(whatnot.get_user(str(i)) for i in range(20)))
+
+                assert server.refreshes == 1
+                assert whatnot.access_data["access_token"]["token"] != "access-old"
+                assert whatnot.access_data["access_token"]["expires_at"] > time.time()
+                assert whatnot.headers["Authorization"] != "Bearer access-old"
+
+    asyncio.run(main())
+
+
+def test_rejected_refresh_token():
+    async def main():
+        async with RefreshServer(reject=True) as server:
+            whatnot = await logged_in(server, auto_refresh=False)
+
+            async with whatnot:
+                with pytest.raises(AuthenticationFailed):
+                    await whatnot.refresh()
+
+    asyncio.run(main())
+
+
+def test_refresh_loop_refreshes_before_expiry_and_stops_when_rejected():
+    async def main():
+        async with RefreshServer() as server:
+            # Due for a refresh a second after logging in
+            whatnot = await logged_in(server, refresh_margin=3600 - 1)
+
+            async with whatnot:
+                await asyncio.sleep(1.5)
+                assert server.refreshes >= 1
+
+                server.reject = True
+                refreshes = server.refreshes
+                await asyncio.sleep(1.5)
+
+                assert server.refreshes == refreshes + 1
+                assert whatnot._refresh_task is None
+
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Optional
+
+from graphql import DocumentNode, ExecutionResult
+
+from . import queries
+from .transport import QueryTransport
+
+# Error codes (or messages) sent back for an unknown hash, and by servers
+# that don't support persisted queries at all
+NOT_FOUND = ("PERSISTED_QUERY_NOT_FOUND", "PersistedQueryNotFound")
+NOT_SUPPORTED = ("PERSISTED_QUERY_NOT_SUPPORTED", "PersistedQueryNotSupported")
+
+
+def _has_error(result: ExecutionResult, codes: tuple) -> bool:
+    return any(
+        (error.get("extensions") or {}).get("code") in codes
+        or error.get("message") in codes
+        for error in result.errors or ()
+    )
+
+
+class PersistedQueryTransport(QueryTransport):
+    """Transport using Apollo's automatic persisted queries
+
+    Each request sends the sha256 hash of its query instead of the text. If
+    the server doesn't know the hash yet it answers PersistedQueryNotFound,
+    and the request is sent again with the text, which the server then
+    remembers. Hashes (and the printed text) are computed once per document,
+    see `queries.persisted_query`. If the server doesn't support persisted
+    queries at all, every later request sends the text as usual.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.enabled = True
+
+        # Requests answered from the hash alone, and those that had to be
+        # sent again with the text
+        self.hits = 0
+        self.misses = 0
+
+    async def execute(
+        self,
+        document: DocumentNode,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        upload_files: bool = False,
+    ) -> ExecutionResult:
+        if upload_files:
+            return await super().execute(
+                document, variable_values, operation_name, extra_args, upload_files
+            )
+
+        query, hash_, name = queries.persisted_query(document)
+
+        payload: Dict[str, Any] = {"operationName": operation_name or name}
+        if variable_values:
+            payload["variables"] = variable_values
+
+        if not self.enabled:
+            payload["query"] = query
+            return await self._post(payload, extra_args)
+
+        payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": hash_}}
+        result = await self._post(payload, extra_args)
+
+        if _has_error(result, NOT_SUPPORTED):
+            self.enabled = False
+            del payload["extensions"]
+        elif _has_error(result, NOT_FOUND):
+            self.misses += 1
+        else:
+            self.hits += 1
+            return result
+
+        payload["query"] = query
+        return await self._post(payload, extra_args)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class BatchLoader:
+    """Coalesces loads made within a short window into a single batch call
+
+    `load_batch` receives the unique keys of a batch in order and must return
+    one result per key. A result that is an exception instance is raised to
+    the callers waiting on that key only.
+    """
+
+    def __init__(
+        self,
+        load_batch: Callable[[List[Hashable]], Awaitable[List[Any]]],
+        max_batch_size: int = 50,
+        delay: float = 0.005,
+    ) -> None:
+        self.load_batch = load_batch
+        self.max_batch_size = max_batch_size
+        self.delay = delay
+
+        self._pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """Queue a key for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self.dispatch()
+        elif self._handle is None:
+            self._handle = loop.call_later(self.delay, self.dispatch)
+
+        return await future
+
+    def dispatch(self) -> None:
+        """Send the pending batch now"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[Hashable, List[asyncio.Future]]) -> None:
+        keys = list(pending)
+
+        try:
+            results = await self.load_batch(keys)
+        except BaseException as e:
+            results = [e] * len(keys)
+
+        for key, result in zip(keys, results):
+            for future in pending[key]:
+                if future.done():
+                    continue
+
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
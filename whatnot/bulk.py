@@ -0,0 +1,156 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+
+class BulkResult:
+    """The outcome of fetching a single item in a bulk fetch"""
+
+    __slots__ = ("index", "key", "value", "error")
+
+    def __init__(
+        self,
+        index: int,
+        key: Any,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.index = index
+        self.key = key
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"<BulkResult key={self.key!r} error={self.error!r}>"
+
+        return f"<BulkResult key={self.key!r} value={self.value!r}>"
+
+
+class BulkStats:
+    """Throughput counters of a bulk fetch"""
+
+    __slots__ = ("succeeded", "failed", "started_at", "finished_at")
+
+    def __init__(self) -> None:
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def per_second(self) -> float:
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "per_second": self.per_second,
+        }
+
+    def __repr__(self) -> str:
+        return f"<BulkStats completed={self.completed} failed={self.failed} per_second={self.per_second:.1f}>"
+
+
+class BulkResults(list):
+    """Bulk fetch results in input order, along with the fetch's stats"""
+
+    def __init__(self, results: Iterable[BulkResult], stats: BulkStats) -> None:
+        super().__init__(results)
+        self.stats = stats
+
+    @property
+    def values(self) -> list:
+        """The fetched values, with None for items that failed"""
+        return [result.value for result in self]
+
+    @property
+    def errors(self) -> list:
+        """The results of items that failed"""
+        return [result for result in self if not result.ok]
+
+
+async def iter_bulk(
+    fetch: Callable[[Any], Awaitable[Any]],
+    keys: Iterable,
+    concurrency: int = 10,
+    stats: Optional[BulkStats] = None,
+) -> AsyncIterator[BulkResult]:
+    """Fetch every key with at most `concurrency` requests in flight
+
+    Results are yielded as they complete. A failed item is reported in its
+    result instead of cancelling the rest.
+    """
+    stats = stats if stats is not None else BulkStats()
+    stats.started_at = time.monotonic()
+    stats.finished_at = None
+
+    keys = enumerate(keys)
+    in_flight = {}
+
+    def start_next() -> bool:
+        try:
+            index, key = next(keys)
+        except StopIteration:
+            return False
+
+        in_flight[asyncio.ensure_future(fetch(key))] = (index, key)
+        return True
+
+    try:
+        while len(in_flight) < concurrency and start_next():
+            pass
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                index, key = in_flight.pop(task)
+
+                if task.cancelled():
+                    stats.failed += 1
+                    result = BulkResult(index, key, error=asyncio.CancelledError())
+                elif task.exception() is not None:
+                    stats.failed += 1
+                    result = BulkResult(index, key, error=task.exception())
+                else:
+                    stats.succeeded += 1
+                    result = BulkResult(index, key, value=task.result())
+
+                start_next()
+                yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+        stats.finished_at = time.monotonic()
+
+
+async def gather_bulk(
+    fetch: Callable[[Any], Awaitable[Any]],
+    keys: Iterable,
+    concurrency: int = 10,
+) -> BulkResults:
+    """Fetch every key with bounded concurrency, returning results in input order"""
+    stats = BulkStats()
+    results = [result async for result in iter_bulk(fetch, keys, concurrency, stats)]
+    results.sort(key=lambda result: result.index)
+
+    return BulkResults(results, stats)
@@ -0,0 +1,476 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Operations that are about the logged in user (or personalized for them).
+# These are only cached when given an explicit TTL.
+AUTHENTICATED_OPERATIONS = frozenset({"UserInfo", "GetPaymentInfo", "GetForYou"})
+
+# Responses of every other operation also include fields that depend on who
+# is asking (e.g. userFollowing, isUserBanned), so all responses are keyed by
+# the user id when logged in, and never shared between accounts.
+
+# Operations that can be kept on disk by `DiskCache`, including their field
+# projections (e.g. "GetUser[id,username]")
+PERSISTENT_OPERATIONS = frozenset({"GetUser", "GetUserById", "GetLivestreamContext"})
+
+# Live stream operations, persisted only once the stream has ended
+LIVESTREAM_OPERATIONS = frozenset({"GetLivestreamContext"})
+
+
+class DiskCache:
+    """Persistent SQLite cache for user and ended livestream responses
+
+    Used as the second tier of a `ResponseCache`, so a restarted process can
+    answer from what it already fetched before going to the network. Users
+    are kept for `ttl` seconds, ended livestreams (which no longer change) for
+    `ended_ttl`, and livestreams that haven't ended aren't kept at all. Once
+    the stored responses exceed `max_bytes` the least recently used are
+    evicted. Queries run in a thread so they don't block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = "whatnot-cache.db",
+        ttl: float = 24 * 60 * 60,
+        ended_ttl: float = 30 * 24 * 60 * 60,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.ended_ttl = ended_ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._size = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, "
+                    "operation TEXT NOT NULL, response TEXT NOT NULL, "
+                    "size INTEGER NOT NULL, expires_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                    "ON responses (accessed_at)"
+                )
+                self._db.execute(
+                    "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+                )
+
+            self._size = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+
+        return self._db
+
+    @staticmethod
+    def _base(operation: str) -> str:
+        return operation.partition("[")[0]
+
+    @staticmethod
+    def key(
+        operation: str, variables: Optional[dict], user_id: Optional[str] = None
+    ) -> str:
+        """Build the cache key of a request"""
+        return " ".join(
+            (
+                operation,
+                str(user_id) if user_id is not None else "",
+                json.dumps(variables or {}, sort_keys=True),
+            )
+        )
+
+    def persists(self, operation: str) -> bool:
+        """Whether responses of an operation can be kept on disk"""
+        return self._base(operation) in PERSISTENT_OPERATIONS
+
+    def ttl_for(self, operation: str, response: dict) -> float:
+        """Get how long to keep a response on disk, 0 meaning not at all"""
+        if not self.persists(operation):
+            return 0
+
+        if self._base(operation) in LIVESTREAM_OPERATIONS:
+            live = response.get("liveStream") or {}
+            return self.ended_ttl if live.get("status") == "ENDED" else 0
+
+        return self.ttl if response.get("getUser") else 0
+
+    def _get(self, key: str) -> Optional[dict]:
+        now = time.time()
+
+        with self._lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            with db:
+                if row[1] <= now:
+                    self._delete(db, "key = ?", (key,))
+                    return None
+
+                db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+
+        return json.loads(row[0])
+
+    def _set(self, key: str, operation: str, response: str, ttl: float) -> None:
+        now = time.time()
+        size = len(response)
+
+        with self._lock:
+            db = self._connect()
+
+            with db:
+                self._delete(db, "key = ?", (key,))
+                db.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, operation, response, size, now + ttl, now),
+                )
+                self._size += size
+
+                if self._size > self.max_bytes:
+                    self._delete(db, "expires_at <= ?", (now,))
+                    self._evict(db)
+
+    def _delete(self, db: sqlite3.Connection, where: str, params: tuple) -> int:
+        removed = db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE {where}",
+            params,
+        ).fetchone()
+        db.execute(f"DELETE FROM responses WHERE {where}", params)
+        self._size -= removed[1]
+
+        return removed[0]
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Remove least recently used responses until under `max_bytes`"""
+        excess = self._size - self.max_bytes
+        keys = []
+
+        for key, size in db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ):
+            if excess <= 0:
+                break
+
+            keys.append((key,))
+            excess -= size
+            self._size -= size
+
+        db.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def _clear(self, operation: Optional[str], variables: Optional[dict]) -> int:
+        with self._lock:
+            db = self._connect()
+
+            with db:
+                if operation is None:
+                    return self._delete(db, "1", ())
+
+                if variables is None:
+                    return self._delete(
+                        db,
+                        "operation = ? OR operation LIKE ?",
+                        (operation, operation + "[%"),
+                    )
+
+                # Keys end with the variables, whatever the user id
+                suffix = " " + json.dumps(variables, sort_keys=True)
+                return self._delete(
+                    db,
+                    "(operation = ? OR operation LIKE ?) AND substr(key, ?) = ?",
+                    (operation, operation + "[%", -len(suffix), suffix),
+                )
+
+    async def get(
+        self,
+        operation: str,
+        variables: Optional[dict],
+        user_id: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Get a fresh stored response, or None"""
+        if not self.persists(operation):
+            return None
+
+        return await asyncio.to_thread(
+            self._get, self.key(operation, variables, user_id)
+        )
+
+    async def set(
+        self,
+        operation: str,
+        variables: Optional[dict],
+        response: dict,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """Store a response if it should be persisted"""
+        ttl = self.ttl_for(operation, response)
+
+        if ttl:
+            await asyncio.to_thread(
+                self._set,
+                self.key(operation, variables, user_id),
+                operation,
+                json.dumps(response),
+                ttl,
+            )
+
+    async def clear(
+        self, operation: Optional[str] = None, variables: Optional[dict] = None
+    ) -> int:
+        """Drop stored responses (of an operation and its projections, and
+        only those with `variables` if given), returning how many were
+        removed"""
+        return await asyncio.to_thread(self._clear, operation, variables)
+
+    @property
+    def size(self) -> int:
+        """Bytes of responses stored"""
+        return self._size
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class ResponseCache:
+    """TTL + LRU cache for GraphQL responses with in-flight deduplication
+
+    `ttl` applies to every operation unless overridden in `ttls`, a mapping
+    of operation name to seconds (0 disables caching for that operation).
+    Entries are evicted least recently used first once `max_entries` or
+    `max_bytes` (measured as serialized JSON) is exceeded. With `disk`, a key
+    missed for the first time since startup is looked up there before making
+    the request; after that the memory TTL decides when it is fetched again.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        disk: Optional[DiskCache] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = disk
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.size = 0
+
+        # key: (expires at, size, response)
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, dict]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, asyncio.Task] = {}
+        self._waiting: Dict[asyncio.Task, int] = {}
+
+        # Keys already looked up on disk
+        self._disk_checked: Set[Tuple] = set()
+
+    def ttl_for(self, operation: str) -> float:
+        """Get the TTL of an operation, 0 meaning it isn't cached
+
+        Projections (e.g. "GetUser[summary]") use their own entry in `ttls`
+        if there is one, otherwise that of the operation they project.
+        """
+        if operation in self.ttls:
+            return self.ttls[operation]
+
+        base = operation.partition("[")[0]
+
+        if base in AUTHENTICATED_OPERATIONS:
+            return self.ttls.get(base, 0)
+
+        return self.ttls.get(base, self.ttl)
+
+    @staticmethod
+    def key(
+        operation: str, variables: Optional[dict], user_id: Optional[str] = None
+    ) -> Tuple:
+        """Build the cache key of a request"""
+        return (
+            operation,
+            json.dumps(variables or {}, sort_keys=True),
+            user_id,
+        )
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        """Get a fresh cached response, or None"""
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key: Tuple, response: dict, ttl: float) -> None:
+        """Store a response for `ttl` seconds"""
+        size = len(json.dumps(response)) if self.max_bytes else 0
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, size, response)
+        self.size += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes and self.size > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple) -> None:
+        self.size -= self._entries.pop(key)[1]
+
+    async def fetch(
+        self,
+        operation: str,
+        variables: Optional[dict],
+        request: Callable[[], Awaitable[dict]],
+        user_id: Optional[str] = None,
+    ) -> dict:
+        """Get a response from the cache, or make the request and cache it
+
+        Concurrent fetches of the same key share a single request
+        """
+        ttl = self.ttl_for(operation)
+
+        if not ttl:
+            return await request()
+
+        key = self.key(operation, variables, user_id)
+        response = self.get(key)
+
+        if response is not None:
+            self.hits += 1
+            return response
+
+        task = self._in_flight.get(key)
+
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = self._in_flight[key] = asyncio.ensure_future(
+                self._load(key, operation, variables, request, ttl)
+            )
+
+        # The request runs in its own task, so a caller that is cancelled
+        # doesn't cancel it for everyone else waiting on it
+        self._waiting[task] = self._waiting.get(task, 0) + 1
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiting[task] == 1:
+                task.cancel()
+
+            raise
+        finally:
+            self._waiting[task] -= 1
+
+            if not self._waiting[task]:
+                del self._waiting[task]
+
+    async def _load(
+        self,
+        key: Tuple,
+        operation: str,
+        variables: Optional[dict],
+        request: Callable[[], Awaitable[dict]],
+        ttl: float,
+    ) -> dict:
+        """Get a response from disk or make the request, and cache it"""
+        try:
+            response = None
+
+            if self.disk is not None and key not in self._disk_checked:
+                self._disk_checked.add(key)
+                response = await self.disk.get(operation, variables, key[2])
+
+            if response is not None:
+                self.disk_hits += 1
+            else:
+                response = await request()
+
+                if self.disk is not None:
+                    await self.disk.set(operation, variables, response, key[2])
+
+            self.set(key, response, ttl)
+            return response
+        finally:
+            del self._in_flight[key]
+
+    async def invalidate(
+        self, operation: Optional[str] = None, variables: Optional[dict] = None
+    ) -> int:
+        """Drop cached responses, in memory and on disk, returning how many
+        were removed
+
+        With no arguments everything is dropped, with only `operation` every
+        response of that operation (and its projections) is dropped.
+        """
+        if operation is None:
+            keys = list(self._entries)
+        else:
+            projection = operation + "["
+            keys = [
+                key
+                for key in self._entries
+                if key[0] == operation or key[0].startswith(projection)
+            ]
+
+            if variables is not None:
+                encoded = json.dumps(variables, sort_keys=True)
+                keys = [key for key in keys if key[1] == encoded]
+
+        for key in keys:
+            self._remove(key)
+
+        removed = len(keys)
+
+        if self.disk is not None:
+            removed += await self.disk.clear(operation, variables)
+
+        return removed
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current usage"""
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
@@ -0,0 +1,82 @@
+import json
+from typing import Any, Callable, Union
+
+import aiohttp
+
+
+class JSONCodec:
+    """A JSON implementation, with `dumps` always returning str"""
+
+    __slots__ = ("name", "loads", "dumps")
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[Union[str, bytes]], Any],
+        dumps: Callable[[Any], str],
+    ) -> None:
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return f"<JSONCodec {self.name!r}>"
+
+
+def _orjson() -> JSONCodec:
+    import orjson
+
+    return JSONCodec("orjson", orjson.loads, lambda obj: orjson.dumps(obj).decode())
+
+
+def _ujson() -> JSONCodec:
+    import ujson
+
+    return JSONCodec("ujson", ujson.loads, ujson.dumps)
+
+
+def _json() -> JSONCodec:
+    return JSONCodec("json", json.loads, json.dumps)
+
+
+CODECS = {"orjson": _orjson, "ujson": _ujson, "json": _json}
+
+
+def get_codec(name: str = "auto") -> JSONCodec:
+    """Get a codec by name, or with "auto" the fastest one installed"""
+    if name != "auto":
+        return CODECS[name]()
+
+    for factory in CODECS.values():
+        try:
+            return factory()
+        except ImportError:
+            pass
+
+
+# Used by models built outside a client, e.g. to decode PaymentInfo.card_metadata
+default_codec = get_codec()
+
+
+def set_default_codec(name: str) -> None:
+    """Change the codec used by models"""
+    global default_codec
+    default_codec = get_codec(name)
+
+
+def response_class(codec: JSONCodec) -> type:
+    """Build an aiohttp response class whose json() decodes with `codec`"""
+
+    class CodecClientResponse(aiohttp.ClientResponse):
+        async def json(
+            self,
+            *,
+            encoding: str = None,
+            loads: Callable = codec.loads,
+            content_type: str = "application/json",
+        ) -> Any:
+            return await super().json(
+                encoding=encoding, loads=loads, content_type=content_type
+            )
+
+    return CodecClientResponse
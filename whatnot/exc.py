@@ -14,3 +14,9 @@ class AuthenticationRequired(AuthenticationError):
 
 class AuthenticationFailed(AuthenticationError):
     pass
+
+
+class WorkerError(Error):
+    """A worker process of a sharded crawl failed"""
+
+    pass
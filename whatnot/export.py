@@ -0,0 +1,280 @@
+import csv
+import os
+from datetime import datetime, timezone
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from . import codec
+from .types import Base
+from .utils import decode_id
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def _get(key: str) -> Callable[[dict], Any]:
+    return lambda data: data.get(key)
+
+
+def _start_time(data: dict) -> Optional[int]:
+    value = data.get("startTime")
+    return int(value) if value is not None else None
+
+
+def _seller_id(data: dict) -> Optional[str]:
+    user = data.get("user")
+    return decode_id(user["id"]) if user and user.get("id") else None
+
+
+def _category_labels(data: dict) -> List[str]:
+    return [node["label"] for node in data.get("categoryNodes") or ()]
+
+
+def _id(data: dict) -> Optional[str]:
+    return decode_id(data["id"]) if data.get("id") else None
+
+
+# Exported columns of each kind of item, read straight from the raw response
+# data: name -> (function of the data, Arrow type)
+COLUMNS = {
+    "live": {
+        "id": (_get("id"), "string"),
+        "title": (_get("title"), "string"),
+        "status": (_get("status"), "string"),
+        "start_time": (_start_time, "timestamp"),
+        "active_viewers": (_get("activeViewers"), "int64"),
+        "seller_id": (_seller_id, "string"),
+        "category_labels": (_category_labels, "list<string>"),
+    },
+    "user": {
+        "id": (_id, "string"),
+        "username": (_get("username"), "string"),
+        "follower_count": (_get("followerCount"), "int64"),
+        "following_count": (_get("followingCount"), "int64"),
+        "sold_count": (_get("soldCount"), "int64"),
+        "is_verified_seller": (_get("isVerifiedSeller"), "bool"),
+    },
+}
+
+FORMATS = {
+    ".parquet": "parquet",
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+
+def _raw(item: Union[dict, Base]) -> dict:
+    """Get the raw data of a model, response node or connection edge"""
+    if isinstance(item, Base):
+        return item._data
+
+    return item.get("node", item)
+
+
+def iter_batches(
+    items: Iterable[Union[dict, Base]], kind: str = "live", batch_size: int = 10000
+) -> Iterator[Dict[str, list]]:
+    """Convert items into column lists, `batch_size` items at a time
+
+    `items` are raw livestream/user dicts or connection edges, e.g. from a
+    `searchLivestreams` response fetched with the "summary" projection, so no
+    models need to be built. Models are accepted too and read from their
+    raw data.
+    """
+    columns = COLUMNS[kind]
+    batch: Dict[str, list] = {name: [] for name in columns}
+    size = 0
+
+    for item in items:
+        data = _raw(item)
+
+        for name, (get, _) in columns.items():
+            batch[name].append(get(data))
+
+        size += 1
+        if size == batch_size:
+            yield batch
+            batch = {name: [] for name in columns}
+            size = 0
+
+    if size:
+        yield batch
+
+
+def to_columns(
+    items: Iterable[Union[dict, Base]], kind: str = "live"
+) -> Dict[str, list]:
+    """Convert items into a single set of column lists"""
+    columns = {name: [] for name in COLUMNS[kind]}
+
+    for batch in iter_batches(items, kind):
+        for name, values in batch.items():
+            columns[name].extend(values)
+
+    return columns
+
+
+"""Arrow/Parquet"""
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise ImportError("pyarrow is required for Arrow and Parquet exports")
+
+
+def arrow_schema(kind: str = "live") -> "pyarrow.Schema":
+    """Get the Arrow schema of exported items"""
+    _require_pyarrow()
+
+    types = {
+        "string": pyarrow.string(),
+        "int64": pyarrow.int64(),
+        "bool": pyarrow.bool_(),
+        "timestamp": pyarrow.timestamp("ms", tz="UTC"),
+        "list<string>": pyarrow.list_(pyarrow.string()),
+    }
+
+    return pyarrow.schema(
+        [(name, types[type_]) for name, (_, type_) in COLUMNS[kind].items()]
+    )
+
+
+def _record_batch(batch: Dict[str, list], schema: "pyarrow.Schema"):
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(batch[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def to_arrow(
+    items: Iterable[Union[dict, Base]], kind: str = "live", batch_size: int = 10000
+) -> "pyarrow.Table":
+    """Convert items into an Arrow table"""
+    schema = arrow_schema(kind)
+
+    return pyarrow.Table.from_batches(
+        [
+            _record_batch(batch, schema)
+            for batch in iter_batches(items, kind, batch_size)
+        ],
+        schema=schema,
+    )
+
+
+def write_parquet(
+    items: Iterable[Union[dict, Base]],
+    path: str,
+    kind: str = "live",
+    batch_size: int = 10000,
+) -> int:
+    """Write items to a Parquet file a batch at a time, returning how many
+    were written"""
+    schema = arrow_schema(kind)
+    count = 0
+
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for batch in iter_batches(items, kind, batch_size):
+            record_batch = _record_batch(batch, schema)
+            writer.write_batch(record_batch)
+            count += record_batch.num_rows
+
+    return count
+
+
+"""CSV/NDJSON"""
+
+
+def _iter_rows(items: Iterable[Union[dict, Base]], kind: str) -> Iterator[dict]:
+    columns = COLUMNS[kind]
+
+    for item in items:
+        data = _raw(item)
+        row = {}
+
+        for name, (get, type_) in columns.items():
+            value = get(data)
+
+            if type_ == "timestamp" and value is not None:
+                value = datetime.fromtimestamp(
+                    value / 1000, tz=timezone.utc
+                ).isoformat()
+
+            row[name] = value
+
+        yield row
+
+
+def write_csv(
+    items: Iterable[Union[dict, Base]], file: Union[str, IO[str]], kind: str = "live"
+) -> int:
+    """Write items to a CSV file a row at a time, returning how many were
+    written. Lists are joined with "|"."""
+    if isinstance(file, str):
+        with open(file, "w", newline="") as f:
+            return write_csv(items, f, kind)
+
+    writer = csv.DictWriter(file, fieldnames=list(COLUMNS[kind]))
+    writer.writeheader()
+    count = 0
+
+    for row in _iter_rows(items, kind):
+        for name, value in row.items():
+            if isinstance(value, list):
+                row[name] = "|".join(value)
+
+        writer.writerow(row)
+        count += 1
+
+    return count
+
+
+def write_ndjson(
+    items: Iterable[Union[dict, Base]], file: Union[str, IO[str]], kind: str = "live"
+) -> int:
+    """Write items as newline-delimited JSON a row at a time, returning how
+    many were written"""
+    if isinstance(file, str):
+        with open(file, "w") as f:
+            return write_ndjson(items, f, kind)
+
+    dumps = codec.default_codec.dumps
+    count = 0
+
+    for row in _iter_rows(items, kind):
+        file.write(dumps(row) + "\n")
+        count += 1
+
+    return count
+
+
+def export(
+    items: Iterable[Union[dict, Base]],
+    path: str,
+    kind: str = "live",
+    format: Optional[str] = None,
+) -> str:
+    """Write items to `path`, returning the format used
+
+    The format is taken from the file extension (see `FORMATS`) unless
+    given, otherwise Parquet is used if pyarrow is installed and NDJSON if
+    not.
+    """
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+
+    if format is None:
+        format = "parquet" if pyarrow is not None else "ndjson"
+
+    if format == "parquet":
+        write_parquet(items, path, kind)
+    elif format == "csv":
+        write_csv(items, path, kind)
+    elif format == "ndjson":
+        write_ndjson(items, path, kind)
+    else:
+        raise ValueError(f"Unknown export format: {format!r}")
+
+    return format
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+import aiohttp
+
+
+class RequestInfo:
+    """Details and timings of a single GraphQL request
+
+    `timings` maps phases to seconds. Phases that didn't happen (e.g. no new
+    connection was opened) are left out:
+
+    - queue: waiting for the rate limiter
+    - pool: waiting for a free connection in the pool
+    - dns: resolving the host
+    - connect: opening the connection, including DNS and TLS
+    - server: from sending the request to receiving the response headers
+    - download: reading the response body
+    - decode: decoding the response
+    - total: the whole request
+
+    `cancelled` is set for requests cut short by the caller rather than
+    failing, e.g. the slower side of a hedged request.
+    """
+
+    __slots__ = (
+        "operation",
+        "variables_size",
+        "response_size",
+        "attempt",
+        "started_at",
+        "timings",
+        "error",
+        "cancelled",
+        "_marks",
+    )
+
+    def __init__(
+        self, operation: Optional[str], variables_size: int = 0, attempt: int = 0
+    ) -> None:
+        self.operation = operation
+        self.variables_size = variables_size
+        self.response_size: Optional[int] = None
+        self.attempt = attempt
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self._marks: Dict[str, float] = {}
+
+    def begin(self, phase: str) -> None:
+        self._marks[phase] = time.perf_counter()
+
+    def end(self, phase: str) -> None:
+        start = self._marks.pop(phase, None)
+
+        if start is not None:
+            self.timings[phase] = time.perf_counter() - start
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.end("decode")
+        self.timings["total"] = time.perf_counter() - self.started_at
+        self.error = error
+        self.cancelled = isinstance(error, asyncio.CancelledError)
+
+    def __repr__(self) -> str:
+        return f"<RequestInfo operation={self.operation!r} total={self.timings.get('total')!r}>"
+
+
+# The request being made by the current task, for the aiohttp trace callbacks
+current_request: ContextVar[Optional[RequestInfo]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def _phase(phase: str, start: bool):
+    async def callback(session, context, params) -> None:
+        info = current_request.get()
+
+        if info is not None:
+            info.begin(phase) if start else info.end(phase)
+
+    return callback
+
+
+async def _on_request_end(session, context, params) -> None:
+    info = current_request.get()
+
+    if info is not None:
+        info.end("server")
+        info.begin("download")
+
+
+async def _on_response_chunk_received(session, context, params) -> None:
+    info = current_request.get()
+
+    if info is not None:
+        info.response_size = (info.response_size or 0) + len(params.chunk)
+        info.end("download")
+        info.begin("decode")
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Build a TraceConfig that records connection timings on `current_request`"""
+    config = aiohttp.TraceConfig()
+
+    config.on_connection_queued_start.append(_phase("pool", True))
+    config.on_connection_queued_end.append(_phase("pool", False))
+    config.on_dns_resolvehost_start.append(_phase("dns", True))
+    config.on_dns_resolvehost_end.append(_phase("dns", False))
+    config.on_connection_create_start.append(_phase("connect", True))
+    config.on_connection_create_end.append(_phase("connect", False))
+    config.on_request_headers_sent.append(_phase("server", True))
+    config.on_request_end.append(_on_request_end)
+    config.on_response_chunk_received.append(_on_response_chunk_received)
+
+    return config
+
+
+class RequestHooks:
+    """Base class for request hooks, subclass it and override what you need"""
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        pass
+
+    def on_request_end(self, info: RequestInfo) -> None:
+        pass
+
+    def on_request_error(self, info: RequestInfo, error: BaseException) -> None:
+        pass
+
+
+class LatencyHistogram(RequestHooks):
+    """Collects request latencies per operation in memory
+
+    Keeps the most recent `max_samples` latencies of each operation for
+    percentiles, and running totals for everything else. Cancelled requests
+    (see `RequestInfo.cancelled`) aren't counted.
+    """
+
+    def __init__(self, max_samples: int = 1024) -> None:
+        self.max_samples = max_samples
+
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+
+    def _record(self, info: RequestInfo) -> None:
+        operation = info.operation or "unknown"
+        latency = info.timings["total"]
+
+        if operation not in self._samples:
+            self._samples[operation] = deque(maxlen=self.max_samples)
+            self._counts[operation] = 0
+            self._errors[operation] = 0
+            self._totals[operation] = 0.0
+
+        self._samples[operation].append(latency)
+        self._counts[operation] += 1
+        self._totals[operation] += latency
+
+    def on_request_end(self, info: RequestInfo) -> None:
+        self._record(info)
+
+    def on_request_error(self, info: RequestInfo, error: BaseException) -> None:
+        # Cut short, so its latency says nothing about the server
+        if info.cancelled:
+            return
+
+        self._record(info)
+        self._errors[info.operation or "unknown"] += 1
+
+    def count(self, operation: str) -> int:
+        """Get the number of latencies kept for an operation"""
+        samples = self._samples.get(operation)
+        return len(samples) if samples else 0
+
+    def percentile(self, operation: str, percentile: float) -> Optional[float]:
+        """Get a latency percentile (0-100) of an operation in seconds"""
+        samples = self._samples.get(operation)
+
+        if not samples:
+            return None
+
+        samples = sorted(samples)
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def export(self) -> Dict[str, dict]:
+        """Export count, errors, mean, max and p50/p95/p99 of every operation"""
+        return {
+            operation: {
+                "count": self._counts[operation],
+                "errors": self._errors[operation],
+                "mean": self._totals[operation] / self._counts[operation],
+                "max": max(samples),
+                "p50": self.percentile(operation, 50),
+                "p95": self.percentile(operation, 95),
+                "p99": self.percentile(operation, 99),
+            }
+            for operation, samples in self._samples.items()
+        }
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self._counts.clear()
+        self._errors.clear()
+        self._totals.clear()
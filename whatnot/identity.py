@@ -0,0 +1,55 @@
+from typing import Any, Optional
+from weakref import WeakValueDictionary
+
+from .types import Base
+
+
+class IdentityMap:
+    """Keeps one model instance per entity across responses
+
+    Entities are keyed by model class and (decoded) id. When data for an
+    entity that is still referenced somewhere arrives again, the existing
+    instance is updated with it and returned instead of building a new one,
+    so the update is visible everywhere the entity is used. Instances are
+    held weakly, unused ones are freed as usual.
+    """
+
+    def __init__(self) -> None:
+        self._entities: "WeakValueDictionary[tuple, Base]" = WeakValueDictionary()
+
+    @staticmethod
+    def key(cls: type, data: dict) -> Optional[tuple]:
+        """Get the identity of an entity, or None if its data has no id"""
+        field = getattr(cls, "id", None)
+        id_ = data.get("id")
+
+        if field is None or id_ is None:
+            return None
+
+        return (cls, field.convert(id_) if field.convert else id_)
+
+    def get(self, cls: type, data: dict) -> Any:
+        """Get the instance of the entity in `data`, creating or updating it"""
+        key = self.key(cls, data)
+
+        if key is None:
+            return cls(data, identity=self)
+
+        entity = self._entities.get(key)
+
+        if entity is None:
+            entity = self._entities[key] = cls(data, identity=self)
+        elif entity._data is not data:
+            # Merge, since the new data may only have some of the fields
+            entity._from_data({**entity._data, **data})
+
+        return entity
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entities
+
+    def clear(self) -> None:
+        self._entities.clear()
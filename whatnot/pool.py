@@ -0,0 +1,250 @@
+import itertools
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+import aiohttp
+
+from .bulk import BulkResult, BulkResults, BulkStats, gather_bulk, iter_bulk
+from .exc import AuthenticationRequired
+from .ratelimit import RateLimiter
+from .sessions import FileSessionStore, SessionStore
+from .types import LiveStream, PaymentInfo, User
+from .whatnot import Whatnot
+
+
+class WhatnotPool:
+    """Many logged in accounts sharing one connection pool
+
+    Each account gets its own `Whatnot` client (and, with `rate`, its own
+    rate limiter of `rate` requests per second), all over one connector.
+    Calls for a specific account, like `get_account_info`, go to that
+    account's client by user id, while anonymous reads like `get_user` and
+    `get_live` take turns between every client, so each account's limit adds
+    to the total. Sessions are kept one file per account in "sessions/"
+    unless `session_store` is given. Other options are passed to every
+    client; a shared `cache` keys responses by account, so one account's
+    responses are never served to another.
+    """
+
+    def __init__(
+        self,
+        session_store: Optional[SessionStore] = None,
+        rate: Optional[float] = None,
+        burst: int = 10,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        ttl_dns_cache: Optional[int] = 10,
+        **options: Any,
+    ) -> None:
+        self.session_store = session_store or FileSessionStore("sessions/{key}.json")
+        self.rate = rate
+        self.burst = burst
+        self.options = options
+
+        # Shared by every client, created with the first one
+        self.connector: Optional[aiohttp.BaseConnector] = None
+        self._connector_options = {
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": ttl_dns_cache,
+        }
+
+        # Logged in clients by user id
+        self.clients: Dict[str, Whatnot] = {}
+
+        # Used for reads while nobody is logged in
+        self._anonymous: Optional[Whatnot] = None
+        self._turn = itertools.count()
+
+    async def __aenter__(self) -> "WhatnotPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def __iter__(self) -> Iterator[Whatnot]:
+        return iter(list(self.clients.values()))
+
+    def __repr__(self) -> str:
+        return f"<WhatnotPool accounts={len(self.clients)}>"
+
+    async def close(self) -> None:
+        """Close every client and the connection pool"""
+        for client in list(self.clients.values()):
+            await client.close()
+
+        self.clients.clear()
+
+        if self._anonymous:
+            await self._anonymous.close()
+            self._anonymous = None
+
+        if self.connector:
+            await self.connector.close()
+            self.connector = None
+
+    def _client(self) -> Whatnot:
+        """Create a client on the shared connection pool"""
+        if not self.connector:
+            self.connector = aiohttp.TCPConnector(**self._connector_options)
+
+        return Whatnot(
+            connector=self.connector,
+            rate_limiter=RateLimiter(self.rate, self.burst) if self.rate else None,
+            session_store=self.session_store,
+            **self.options,
+        )
+
+    async def _register(self, client: Whatnot) -> Whatnot:
+        user_id = str(client.access_data["user_id"])
+
+        if user_id in self.clients:
+            await self.clients[user_id].close()
+
+        self.clients[user_id] = client
+        return client
+
+    """Accounts"""
+
+    async def add(self, access_data: dict) -> Whatnot:
+        """Add an account using its access data, returning its client"""
+        client = self._client()
+        await client.login_with_access_data(access_data)
+
+        return await self._register(client)
+
+    async def login(
+        self, username: str, password: str, interaction: bool = False
+    ) -> Whatnot:
+        """Add an account using its email and password, returning its client"""
+        client = self._client()
+
+        try:
+            await client.login(username, password, interaction)
+        except BaseException:
+            await client.close()
+            raise
+
+        return await self._register(client)
+
+    async def load_sessions(
+        self, keys: Optional[Iterable[str]] = None
+    ) -> List[Whatnot]:
+        """Add the accounts saved in the session store, or those saved as
+        `keys`, returning their clients"""
+        if keys is None:
+            keys = await self.session_store.keys()
+
+        clients = []
+        for key in keys:
+            client = self._client()
+
+            try:
+                await client.load_session(key)
+            except BaseException:
+                await client.close()
+                raise
+
+            clients.append(await self._register(client))
+
+        return clients
+
+    async def remove(self, user_id: str) -> None:
+        """Remove an account and close its client"""
+        client = self.clients.pop(str(user_id), None)
+
+        if client:
+            await client.close()
+
+    def get(self, user_id: str) -> Whatnot:
+        """Get the client of an account"""
+        try:
+            return self.clients[str(user_id)]
+        except KeyError:
+            raise AuthenticationRequired(
+                f"No account with user id {user_id!r} in the pool"
+            ) from None
+
+    def next_client(self) -> Whatnot:
+        """Get the client whose turn it is to make an anonymous read"""
+        if not self.clients:
+            if not self._anonymous:
+                self._anonymous = self._client()
+
+            return self._anonymous
+
+        clients = list(self.clients.values())
+        return clients[next(self._turn) % len(clients)]
+
+    """Account Info"""
+
+    async def get_account_info(self, user_id: str) -> dict:
+        """Get the account information of an account"""
+        return await self.get(user_id).get_account_info()
+
+    async def get_default_payment(self, user_id: str) -> PaymentInfo:
+        """Get the default payment information of an account"""
+        return await self.get(user_id).get_default_payment()
+
+    """Users"""
+
+    async def get_user(
+        self, username: str, fields: Union[str, Iterable[str], None] = None
+    ) -> User:
+        """Get a user by their username"""
+        return await self.next_client().get_user(username, fields)
+
+    async def get_user_by_id(
+        self, id_: str, fields: Union[str, Iterable[str], None] = None
+    ) -> User:
+        """Get a user by their id"""
+        return await self.next_client().get_user_by_id(id_, fields)
+
+    async def get_users_by_id(
+        self, ids: Iterable[str], concurrency: int = 10
+    ) -> BulkResults:
+        """Get many users by their ids, spread across every account"""
+        return await gather_bulk(self.get_user_by_id, ids, concurrency)
+
+    def iter_users_by_id(
+        self,
+        ids: Iterable[str],
+        concurrency: int = 10,
+        stats: Optional[BulkStats] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Get many users by their ids, yielding results as they complete"""
+        return iter_bulk(self.get_user_by_id, ids, concurrency, stats)
+
+    async def get_user_lives(
+        self,
+        user_id: str,
+        first: int = 6,
+        fields: Union[str, Iterable[str], None] = None,
+    ) -> List[LiveStream]:
+        """Get a user's lives by their id"""
+        return await self.next_client().get_user_lives(user_id, first, fields)
+
+    """Lives"""
+
+    async def get_live(
+        self, id_: str, fields: Union[str, Iterable[str], None] = None
+    ) -> LiveStream:
+        """Get a livestream by ID"""
+        return await self.next_client().get_live(id_, fields)
+
+    async def get_lives(self, ids: Iterable[str], concurrency: int = 10) -> BulkResults:
+        """Get many livestreams by ID, spread across every account"""
+        return await gather_bulk(self.get_live, ids, concurrency)
+
+    def iter_lives(
+        self,
+        ids: Iterable[str],
+        concurrency: int = 10,
+        stats: Optional[BulkStats] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Get many livestreams by ID, yielding results as they complete"""
+        return iter_bulk(self.get_live, ids, concurrency, stats)
@@ -1,3 +1,20 @@
+from functools import lru_cache
+from hashlib import sha256
+from typing import Dict, Iterable, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from gql import gql
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    OperationType,
+    SelectionSetNode,
+    get_operation_ast,
+    print_ast,
+)
+
+from .types import Field, LiveStream, User
+
 USER_QUERY = """
     id
     username
@@ -52,6 +69,14 @@ LIVE_QUERY = (
     """
 )
 
+# Fields that change while a stream is running, polled by `watch_lives`
+LIVE_STATUS_QUERY = """
+    id
+    status
+    activeViewers
+    pinnedProductId
+"""
+
 ME_QUERY = """
 me {
     id
@@ -116,8 +141,14 @@ FDR_YOU_QUERY = (
 forYou {
     id
     title
-    sections {
+    sections(first: $first, after: $after) {
         totalCount
+        pageInfo {
+            startCursor
+            endCursor
+            hasNextPage
+            hasPreviousPage
+        }
         edges {
             node {
                 id
@@ -138,6 +169,7 @@ forYou {
                     edges {
                         cursor
                         node {
+                        __typename
                         ... on CategoryNode {
                         id
                         type
@@ -165,14 +197,341 @@ forYou {
         }
     }
 }
-            pageInfo {
-                startCursor
-                endCursor
-                hasNextPage
-                hasPreviousPage
-            }
         }
     }
 }
 """
 )
+
+"""Operations"""
+
+# Full documents for every operation the client sends, keyed by name
+OPERATIONS = {
+    "UserInfo": "query UserInfo {\n  me {\n    id\n    bio\n    email\n    phoneNumber\n    firstName\n    lastName\n    displayName\n    canGoLive\n    salesTaxExempt\n    username\n    directMessagingDisabled\n    hasMarketplaceAccess\n    sellerProfileClipsHidden\n    sellerProfileVodsHidden\n    activityStatusEnabled\n    shippingLabelFormat\n    profileImage {\n      id\n      bucket\n      key\n      __typename\n    }\n    defaultCard {\n      customerReference\n      cardMetadata\n      __typename\n    }\n    defaultShippingAddress {\n      fullName\n      postalCode\n      line1\n      line2\n      city\n      state\n      countryCode\n      __typename\n    }\n    homeAddress {\n      fullName\n      postalCode\n      line1\n      line2\n      city\n      state\n      countryCode\n      __typename\n    }\n    walletEntries {\n      address\n      chainType\n      __typename\n    }\n    __typename\n  }\n}",
+    "GetPaymentInfo": (
+        """
+            query GetPaymentInfo {
+            """
+        + ME_PAYMENT_QUERY
+        + "}"
+    ),
+    "GetUser": (
+        """
+            query GetUser($username: String) {
+                getUser(username: $username) {
+            """
+        + USER_QUERY
+        + "}}"
+    ),
+    "GetUserById": (
+        """
+        query GetUser($id: ID) {
+            getUser(id: $id) {
+        """
+        + USER_QUERY
+        + "}}"
+    ),
+    "GetUserLiveStreams": (
+        """
+        query GetUserLiveStreams($userId: ID!, $first: Int) {
+            searchLivestreams(userIds: [$userId], first: $first) {
+                edges {
+                    node {
+                        ... on LiveStream {"""
+        + LIVE_QUERY
+        + "}}}}}"
+    ),
+    "GetUserLiveStreamsPage": (
+        """
+        query GetUserLiveStreamsPage($userId: ID!, $first: Int, $after: String) {
+            searchLivestreams(userIds: [$userId], first: $first, after: $after) {
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
+                edges {
+                    node {
+                        ... on LiveStream {"""
+        + LIVE_QUERY
+        + "}}}}}"
+    ),
+    "GetForYou": (
+        """
+        query GetForYou($first: Int, $after: String, $userId: ID) {"""
+        + FDR_YOU_QUERY
+        + "}"
+    ),
+    "GetLivestreamContext": (
+        """
+        query GetLivestreamContext($id: ID!, $userId: ID) {
+            liveStream(id: $id) {
+                ...LivestreamFragment
+            }
+        }
+
+        fragment LivestreamFragment on LiveStream {"""
+        + LIVE_QUERY
+        + "}"
+    ),
+}
+
+# Subscriptions sent over the WebSocket by `realtime.LiveSubscriptions`. The
+# realtime schema isn't public, so these are modelled on the events the web
+# client shows and may need adjusting.
+SUBSCRIPTIONS = {
+    "LivestreamEvents": """
+        subscription LivestreamEvents($livestreamId: ID!) {
+            liveStreamEvents(livestreamId: $livestreamId) {
+                __typename
+                ... on ChatMessage {
+                    id
+                    message
+                    createdAt
+                    user {
+                        id
+                        username
+                    }
+                }
+                ... on Bid {
+                    id
+                    productId
+                    amount {
+                        amount
+                        currency
+                    }
+                    user {
+                        id
+                        username
+                    }
+                }
+                ... on PinnedProductUpdate {
+                    productId
+                }
+                ... on ViewerCountUpdate {
+                    activeViewers
+                }
+            }
+        }
+    """,
+}
+
+_documents: Dict[str, DocumentNode] = {}
+
+
+def get_document(name: str) -> DocumentNode:
+    """Get the parsed document for a registered operation, parsing it on first use"""
+    try:
+        return _documents[name]
+    except KeyError:
+        document = _documents[name] = gql(OPERATIONS[name])
+        return document
+
+
+@lru_cache(maxsize=128)
+def parse(query: str) -> DocumentNode:
+    """Parse an ad-hoc query, caching the result by its text"""
+    return gql(query)
+
+
+def operation_name(document: DocumentNode) -> Optional[str]:
+    """Get the name of the operation in a document"""
+    operation = get_operation_ast(document)
+    return operation.name.value if operation and operation.name else None
+
+
+def is_query(document: DocumentNode) -> bool:
+    """Whether a document is a query, and so safe to send more than once"""
+    operation = get_operation_ast(document)
+    return operation is not None and operation.operation == OperationType.QUERY
+
+
+# Printed text, sha256 hash and operation name of each document sent
+_persisted: "WeakKeyDictionary[DocumentNode, Tuple[str, str, Optional[str]]]" = (
+    WeakKeyDictionary()
+)
+
+
+def persisted_query(document: DocumentNode) -> Tuple[str, str, Optional[str]]:
+    """Get the text, sha256 hash and operation name of a document, for
+    automatic persisted queries, computing them once per document"""
+    try:
+        return _persisted[document]
+    except KeyError:
+        query = print_ast(document)
+        result = _persisted[document] = (
+            query,
+            sha256(query.encode("utf-8")).hexdigest(),
+            operation_name(document),
+        )
+        return result
+
+
+def compile_all() -> None:
+    """Parse (and hash) every registered operation up front instead of on
+    first use"""
+    for name in OPERATIONS:
+        persisted_query(get_document(name))
+
+
+# Fields that can be coalesced into a single aliased operation by `batch_query`
+# name: (alias prefix, variable type, field, selection, extra variables, fragments)
+BATCHES = {
+    "GetUser": ("u", "String", "getUser(username: $%s)", USER_QUERY, "", ""),
+    "GetUserById": ("u", "ID", "getUser(id: $%s)", USER_QUERY, "", ""),
+    "GetLivestreamContext": (
+        "l",
+        "ID!",
+        "liveStream(id: $%s)",
+        "...LivestreamFragment",
+        ", $userId: ID",
+        "fragment LivestreamFragment on LiveStream {" + LIVE_QUERY + "}",
+    ),
+    "GetLivestreamStatus": (
+        "s",
+        "ID!",
+        "liveStream(id: $%s)",
+        LIVE_STATUS_QUERY,
+        "",
+        "",
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def batch_query(name: str, size: int) -> str:
+    """Build a query fetching `size` items of a batchable operation at once
+
+    Item `i` is passed as variable `v{i}` and returned under the alias
+    `{prefix}{i}`, e.g. `u0: getUser(id: $v0)`
+    """
+    prefix, type_, field, selection, extra, fragments = BATCHES[name]
+
+    variables = ", ".join(f"$v{i}: {type_}" for i in range(size))
+    fields = "\n".join(
+        f"{prefix}{i}: {field % f'v{i}'} {{{selection}}}" for i in range(size)
+    )
+
+    return f"query Batch{name}({variables}{extra}) {{\n{fields}\n}}\n{fragments}"
+
+
+"""Field projections"""
+
+# Operations that can fetch a subset of their fields, and the model they return
+PROJECTABLE = {
+    "GetUser": User,
+    "GetUserById": User,
+    "GetUserLiveStreams": LiveStream,
+    "GetUserLiveStreamsPage": LiveStream,
+    "GetLivestreamContext": LiveStream,
+}
+
+# The full selection of each projectable model
+SELECTIONS = {User: USER_QUERY, LiveStream: LIVE_QUERY}
+
+# Named projections for the `fields` argument of query methods, None meaning
+# every field
+FIELD_PRESETS = {
+    User: {
+        "minimal": ("id", "username"),
+        "full": None,
+    },
+    LiveStream: {
+        "minimal": ("id", "title", "status"),
+        "summary": (
+            "id",
+            "title",
+            "status",
+            "start_time",
+            "active_viewers",
+            "category_nodes",
+            "user.id",
+            "user.username",
+        ),
+        "full": None,
+    },
+}
+
+
+def _graphql_path(model: Optional[type], path: str) -> str:
+    """Translate a dotted path of model attribute names into GraphQL field names
+
+    Names that aren't model attributes are assumed to be GraphQL names already
+    """
+    names = []
+
+    for name in path.split("."):
+        field = getattr(model, name, None) if model else None
+
+        if isinstance(field, Field):
+            names.append(field.key)
+            model = field.convert if isinstance(field.convert, type) else None
+        else:
+            names.append(name)
+            model = None
+
+    return ".".join(names)
+
+
+def _select(selection_set: SelectionSetNode, paths: Iterable[str]) -> str:
+    """Print the parts of a selection set picked by dotted field paths"""
+    children: Dict[str, list] = {}
+
+    for path in paths:
+        name, _, rest = path.partition(".")
+        children.setdefault(name, [])
+
+        if rest:
+            children[name].append(rest)
+
+    selected = []
+    for node in selection_set.selections:
+        if not isinstance(node, FieldNode) or node.name.value not in children:
+            continue
+
+        subpaths = children.pop(node.name.value)
+
+        if subpaths and node.selection_set:
+            selected.append(
+                f"{node.name.value} {{{_select(node.selection_set, subpaths)}}}"
+            )
+        else:
+            selected.append(print_ast(node))
+
+    if children:
+        raise ValueError(f"Unknown fields: {', '.join(children)}")
+
+    return "\n".join(selected)
+
+
+def project(name: str, fields: Union[str, Iterable[str], None]) -> str:
+    """Get the registry name of an operation that fetches only `fields`
+
+    `fields` is a preset name from `FIELD_PRESETS`, or model attribute names
+    (or GraphQL field names), using dots for nested fields, e.g. `user.id`.
+    The projected operation is built and registered once per projection.
+    """
+    model = PROJECTABLE[name]
+
+    if isinstance(fields, str):
+        fields = FIELD_PRESETS[model][fields]
+
+    if fields is None:
+        return name
+
+    return _projected(name, tuple(sorted({_graphql_path(model, i) for i in fields})))
+
+
+@lru_cache(maxsize=None)
+def _projected(name: str, paths: Tuple[str, ...]) -> str:
+    base = SELECTIONS[PROJECTABLE[name]]
+    selection = _select(get_operation_ast(parse("{" + base + "}")).selection_set, paths)
+    query = OPERATIONS[name].replace(base, selection)
+
+    # Drop the $userId variable when isUserModerator isn't selected
+    if "$userId)" not in selection:
+        query = query.replace(", $userId: ID)", ")")
+
+    key = f"{name}[{','.join(paths)}]"
+    OPERATIONS[key] = query
+
+    return key
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Status codes that mean "slow down and try again"
+RETRY_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or an HTTP date) into seconds"""
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Get the Retry-After delay of a failed request in seconds, if any
+
+    The headers are read from the response that failed (the
+    ClientResponseError the transport error was raised from) rather than the
+    transport's last response, which concurrent requests overwrite
+    """
+    headers = getattr(error.__cause__, "headers", None) or {}
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+class RateLimiter:
+    """Token bucket limiter, which can be shared between Whatnot instances
+
+    Allows `rate` requests per second on average with bursts of up to
+    `burst` requests. When the server asks us to slow down, `backoff` pauses
+    every client using the limiter.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10,
+        burst: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 1,
+        max_backoff: float = 60,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+
+        self.retries = 0
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        # Waiters queue on the lock so tokens are handed out in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Pause all requests after a rate limited response, returning the delay
+
+        Uses the server's Retry-After when given, otherwise backs off
+        exponentially with the attempt number
+        """
+        if retry_after is None:
+            retry_after = self.backoff_base * 2**attempt
+
+        delay = min(retry_after, self.max_backoff)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self.retries += 1
+
+        return delay
@@ -0,0 +1,426 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Optional
+
+import aiohttp
+from gql.transport.exceptions import TransportProtocolError
+
+from . import queries
+
+if TYPE_CHECKING:
+    from .whatnot import Whatnot
+
+# WebSocket subprotocol spoken by `LiveSubscriptions`
+PROTOCOL = "graphql-transport-ws"
+
+# Event kinds by the __typename of a subscription payload
+EVENT_KINDS = {
+    "ChatMessage": "chat",
+    "Bid": "bid",
+    "PinnedProductUpdate": "pinned_product",
+    "ViewerCountUpdate": "viewers",
+}
+
+# What to do with a new event when a stream's queue is full: drop the oldest
+# queued event, drop the new event, or stop reading the socket until there
+# is room (which holds up every stream on it)
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# Queued after a stream's last event
+_END = object()
+
+
+class SubscriptionEvent:
+    """A realtime event of a livestream
+
+    `kind` is one of the values of `EVENT_KINDS` (or the payload's __typename
+    if it isn't known), or "error" with the GraphQL errors as `data`.
+    """
+
+    __slots__ = ("live_id", "kind", "data", "timestamp")
+
+    def __init__(self, live_id: str, kind: str, data: Any) -> None:
+        self.live_id = live_id
+        self.kind = kind
+        self.data = data
+        self.timestamp = time.time()
+
+    def __repr__(self) -> str:
+        return f"<SubscriptionEvent live_id={self.live_id!r} kind={self.kind!r}>"
+
+
+class LiveSubscription:
+    """The events of one livestream, as an async iterator
+
+    Iteration ends once the subscription completes or is unsubscribed.
+    `dropped` counts events discarded because the queue was full.
+    """
+
+    def __init__(self, live_id: str, id_: str, queue_size: int) -> None:
+        self.live_id = live_id
+        self.id = id_
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.closed = False
+
+        # Whether it is waiting in its LiveSubscriptions' ready queue
+        self.ready = False
+
+    def __aiter__(self) -> "LiveSubscription":
+        return self
+
+    async def __anext__(self) -> SubscriptionEvent:
+        item = await self.queue.get()
+
+        if item is _END:
+            # Leave it for the next call
+            self.queue.put_nowait(_END)
+            raise StopAsyncIteration
+
+        return item
+
+    def __repr__(self) -> str:
+        return (
+            f"<LiveSubscription live_id={self.live_id!r} queued={self.queue.qsize()}>"
+        )
+
+
+class LiveSubscriptions:
+    """Realtime events of many livestreams over one WebSocket
+
+    Each subscribed stream gets its own queue of up to `queue_size` events,
+    handled by `overflow` (see `OVERFLOW_POLICIES`) when full. Read a stream
+    by iterating the `LiveSubscription` returned by `subscribe`, or every
+    stream at once, taking turns between streams, by iterating this object;
+    use one or the other for a given stream. Lost connections are reopened
+    and resubscribed if `reconnect` is set.
+
+    The connection uses the graphql-transport-ws protocol on the GraphQL
+    endpoint, and subscribes with `queries.SUBSCRIPTIONS`.
+    """
+
+    def __init__(
+        self,
+        whatnot: "Whatnot",
+        url: Optional[str] = None,
+        queue_size: int = 1000,
+        overflow: str = "drop_oldest",
+        heartbeat: Optional[float] = 30.0,
+        ack_timeout: float = 10.0,
+        reconnect: bool = True,
+        max_backoff: float = 30.0,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+
+        self.whatnot = whatnot
+        self.url = url or whatnot.gql_url.replace("http", "ws", 1)
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.heartbeat = heartbeat
+        self.ack_timeout = ack_timeout
+        self.reconnect = reconnect
+        self.max_backoff = max_backoff
+
+        self.reconnects = 0
+
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._ids = itertools.count(1)
+
+        # Active subscriptions by livestream id and by operation id
+        self._subscriptions: Dict[str, LiveSubscription] = {}
+        self._by_id: Dict[str, LiveSubscription] = {}
+
+        # Subscriptions that may have queued events, in the order to read them
+        self._ready: Deque[LiveSubscription] = deque()
+        self._wakeup = asyncio.Event()
+
+    async def __aenter__(self) -> "LiveSubscriptions":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def __aiter__(self) -> AsyncIterator[SubscriptionEvent]:
+        return self.events()
+
+    async def connect(self) -> None:
+        """Open the WebSocket and start reading events"""
+        if self._task:
+            return
+
+        await self._open()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Close the WebSocket, ending every subscription"""
+        self._closed = True
+
+        if self._task:
+            self._task.cancel()
+
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                # Errors of the reader were already delivered to subscriptions
+                pass
+
+            self._task = None
+
+        if self._ws:
+            await self._ws.close()
+            self._ws = None
+
+        for subscription in list(self._subscriptions.values()):
+            self._remove(subscription)
+
+        self._wakeup.set()
+
+    async def subscribe(self, live_id: str) -> LiveSubscription:
+        """Start receiving the events of a livestream"""
+        if live_id in self._subscriptions:
+            return self._subscriptions[live_id]
+
+        subscription = LiveSubscription(live_id, str(next(self._ids)), self.queue_size)
+        self._subscriptions[live_id] = self._by_id[subscription.id] = subscription
+
+        # Otherwise it is sent once reconnected
+        if self._ws:
+            await self._send_subscribe(subscription)
+
+        return subscription
+
+    async def unsubscribe(self, live_id: str) -> None:
+        """Stop receiving the events of a livestream"""
+        subscription = self._subscriptions.get(live_id)
+
+        if subscription is None:
+            return
+
+        self._remove(subscription)
+
+        if self._ws:
+            await self._send({"id": subscription.id, "type": "complete"})
+
+    async def events(self) -> AsyncIterator[SubscriptionEvent]:
+        """Yield the events of every subscribed stream until closed"""
+        while True:
+            if not self._ready:
+                if self._closed:
+                    return
+
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            subscription = self._ready.popleft()
+            subscription.ready = False
+
+            if subscription.queue.empty():
+                continue
+
+            item = subscription.queue.get_nowait()
+
+            if item is _END:
+                continue
+
+            if not subscription.queue.empty():
+                self._mark_ready(subscription)
+
+            yield item
+
+    """Connection"""
+
+    async def _send(self, message: dict) -> None:
+        await self._ws.send_str(self.whatnot.codec.dumps(message))
+
+    async def _send_subscribe(self, subscription: LiveSubscription) -> None:
+        await self._send(
+            {
+                "id": subscription.id,
+                "type": "subscribe",
+                "payload": {
+                    "query": queries.SUBSCRIPTIONS["LivestreamEvents"],
+                    "variables": {"livestreamId": subscription.live_id},
+                    "operationName": "LivestreamEvents",
+                },
+            }
+        )
+
+    async def _open(self) -> None:
+        """Connect, wait for the server to acknowledge us and (re)subscribe"""
+        await self.whatnot._connect()
+
+        self._ws = await self.whatnot.session.ws_connect(
+            self.url, protocols=(PROTOCOL,), heartbeat=self.heartbeat
+        )
+
+        try:
+            payload = {}
+            if "Authorization" in self.whatnot.headers:
+                payload["Authorization"] = self.whatnot.headers["Authorization"]
+
+            await self._send({"type": "connection_init", "payload": payload})
+
+            message = await self._ws.receive(timeout=self.ack_timeout)
+            if message.type != aiohttp.WSMsgType.TEXT or (
+                self.whatnot.codec.loads(message.data).get("type") != "connection_ack"
+            ):
+                raise TransportProtocolError(
+                    f"Expected connection_ack, got {message.data!r}"
+                )
+
+            for subscription in self._subscriptions.values():
+                await self._send_subscribe(subscription)
+        except BaseException:
+            await self._ws.close()
+            self._ws = None
+            raise
+
+    async def _run(self) -> None:
+        """Read messages, reconnecting with backoff if the connection drops"""
+        attempt = 0
+
+        while True:
+            try:
+                if self._ws is None:
+                    await self._open()
+                    self.reconnects += 1
+                    attempt = 0
+
+                async for message in self._ws:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        await self._handle(self.whatnot.codec.loads(message.data))
+                    elif message.type == aiohttp.WSMsgType.ERROR:
+                        break
+            except Exception:
+                # A lost connection, protocol error or undecodable message
+                # drops the connection, it is reopened (or every stream
+                # ended) below
+                pass
+
+            if self._ws:
+                await self._ws.close()
+                self._ws = None
+
+            if not self.reconnect:
+                for subscription in list(self._subscriptions.values()):
+                    self._deliver_nowait(
+                        subscription,
+                        SubscriptionEvent(
+                            subscription.live_id,
+                            "error",
+                            [{"message": "Connection lost"}],
+                        ),
+                    )
+                    self._remove(subscription)
+
+                self._closed = True
+                self._wakeup.set()
+                return
+
+            await asyncio.sleep(min(2**attempt * 0.5, self.max_backoff))
+            attempt += 1
+
+    async def _handle(self, message: dict) -> None:
+        type_ = message.get("type")
+
+        if type_ == "ping":
+            await self._send({"type": "pong"})
+            return
+
+        subscription = self._by_id.get(message.get("id"))
+
+        if subscription is None:
+            return
+
+        payload = message.get("payload")
+
+        if type_ == "next":
+            if not isinstance(payload, dict) or not isinstance(
+                payload.get("data") or {}, dict
+            ):
+                await self._deliver(
+                    subscription,
+                    SubscriptionEvent(
+                        subscription.live_id,
+                        "error",
+                        [{"message": f"Malformed payload: {payload!r}"}],
+                    ),
+                )
+                return
+
+            if payload.get("errors"):
+                await self._deliver(
+                    subscription,
+                    SubscriptionEvent(subscription.live_id, "error", payload["errors"]),
+                )
+
+            for data in (payload.get("data") or {}).values():
+                if data is None:
+                    continue
+
+                if not isinstance(data, dict):
+                    data = [{"message": f"Malformed event: {data!r}"}]
+                    kind = "error"
+                else:
+                    kind = EVENT_KINDS.get(
+                        data.get("__typename"), data.get("__typename")
+                    )
+
+                await self._deliver(
+                    subscription, SubscriptionEvent(subscription.live_id, kind, data)
+                )
+        elif type_ == "error":
+            self._deliver_nowait(
+                subscription, SubscriptionEvent(subscription.live_id, "error", payload)
+            )
+            self._remove(subscription)
+        elif type_ == "complete":
+            self._remove(subscription)
+
+    """Queues"""
+
+    def _mark_ready(self, subscription: LiveSubscription) -> None:
+        # Once at most, however its queue is read
+        if not subscription.ready:
+            subscription.ready = True
+            self._ready.append(subscription)
+            self._wakeup.set()
+
+    async def _deliver(self, subscription: LiveSubscription, item: Any) -> None:
+        """Queue an event, applying the overflow policy if the queue is full"""
+        if subscription.queue.full() and self.overflow != "block":
+            if self.overflow == "drop_newest":
+                subscription.dropped += 1
+                return
+
+            subscription.queue.get_nowait()
+            subscription.dropped += 1
+
+        self._mark_ready(subscription)
+        await subscription.queue.put(item)
+
+    def _deliver_nowait(self, subscription: LiveSubscription, item: Any) -> None:
+        """Queue an item, dropping the oldest if the queue is full"""
+        if subscription.queue.full():
+            subscription.queue.get_nowait()
+            subscription.dropped += 1
+
+        self._mark_ready(subscription)
+        subscription.queue.put_nowait(item)
+
+    def _remove(self, subscription: LiveSubscription) -> None:
+        """Forget a subscription and end its events"""
+        if subscription.closed:
+            return
+
+        subscription.closed = True
+        self._subscriptions.pop(subscription.live_id, None)
+        self._by_id.pop(subscription.id, None)
+        self._deliver_nowait(subscription, _END)
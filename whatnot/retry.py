@@ -0,0 +1,154 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from gql.transport.exceptions import TransportServerError
+
+from .hooks import LatencyHistogram
+
+# Status codes of failed requests that are worth trying again
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+def transient(error: BaseException) -> bool:
+    """Whether an error might not happen again: a timeout, a lost connection
+    or one of `TRANSIENT_STATUSES`"""
+    if isinstance(error, TransportServerError):
+        return error.code is None or error.code in TRANSIENT_STATUSES
+
+    return isinstance(
+        error,
+        (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ),
+    )
+
+
+class RetryPolicy:
+    """Timeouts, retries and hedging for GraphQL requests
+
+    Every attempt is given `timeout` seconds from when it is sent (not
+    counting time waiting for the rate limiter), unless its operation (or the
+    operation it is a projection of) has its own in `timeouts`. Queries that
+    fail with a transient error (a timeout, a lost connection or one of
+    `TRANSIENT_STATUSES`) are retried up to `max_retries` times, waiting a
+    random delay of up to `backoff_base * 2 ** retry` seconds (capped at
+    `max_backoff`) first. Mutations are never retried or hedged.
+
+    With `hedge`, a `LatencyHistogram` that is also one of the client's hooks,
+    a query that hasn't been answered by the `hedge_percentile` latency of
+    its operation is sent a second time and the first response is used.
+    Hedging starts once `min_samples` latencies of the operation are known.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = 30,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        max_backoff: float = 5,
+        hedge: Optional[LatencyHistogram] = None,
+        hedge_percentile: float = 95,
+        min_samples: int = 20,
+    ) -> None:
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+
+        self.retries = 0
+        self.timeouts_hit = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def timeout_for(self, operation: Optional[str]) -> Optional[float]:
+        """Get the timeout of an attempt of an operation, None meaning no timeout"""
+        if operation in self.timeouts:
+            return self.timeouts[operation]
+
+        return self.timeouts.get((operation or "").partition("[")[0], self.timeout)
+
+    def retryable(self, error: BaseException) -> bool:
+        """Whether an error might not happen again"""
+        return transient(error)
+
+    def backoff(self, retry: int) -> float:
+        """Get a jittered delay before a retry"""
+        self.retries += 1
+        return random.uniform(0, min(self.backoff_base * 2**retry, self.max_backoff))
+
+    def hedge_delay(self, operation: Optional[str]) -> Optional[float]:
+        """Get how long to wait before hedging a request, None meaning don't"""
+        if (
+            not self.hedge
+            or self.hedge.count(operation or "unknown") < self.min_samples
+        ):
+            return None
+
+        return self.hedge.percentile(operation or "unknown", self.hedge_percentile)
+
+    async def timed(self, request: Awaitable[Any], operation: Optional[str]) -> Any:
+        """Wait for a sent request, up to the timeout of its operation"""
+        try:
+            return await asyncio.wait_for(request, self.timeout_for(operation))
+        except asyncio.TimeoutError:
+            self.timeouts_hit += 1
+            raise
+
+    async def run(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        operation: Optional[str],
+        idempotent: bool,
+    ) -> Any:
+        """Make one attempt of a request, hedging it if enabled and safe
+
+        `send` applies the timeout itself with `timed`, once the request is
+        allowed through the rate limiter.
+        """
+        delay = self.hedge_delay(operation) if idempotent else None
+
+        if delay is None:
+            return await send()
+
+        return await self._hedged(send, delay)
+
+    async def _hedged(self, send: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        first = asyncio.ensure_future(send())
+        tasks = {first}
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(send()))
+
+            # Use the first success, or raise the last error if both failed
+            while True:
+                done, pending = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+
+                        return task.result()
+
+                if not pending:
+                    return next(iter(done)).result()
+
+                tasks = pending
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class SessionStore:
+    """Where access data is kept between runs, keyed by account"""
+
+    async def load(self, key: str = "default") -> Optional[dict]:
+        """Get the saved access data of an account, or None"""
+        raise NotImplementedError
+
+    async def save(self, key: str, data: dict) -> None:
+        """Save the access data of an account"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Forget an account"""
+        raise NotImplementedError
+
+    async def keys(self) -> List[str]:
+        """Get the accounts that have saved access data"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Keeps access data in memory, e.g. to share it between clients"""
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, dict] = {}
+
+    async def load(self, key: str = "default") -> Optional[dict]:
+        return self._sessions.get(key)
+
+    async def save(self, key: str, data: dict) -> None:
+        self._sessions[key] = data
+
+    async def delete(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    async def keys(self) -> List[str]:
+        return list(self._sessions)
+
+
+class FileSessionStore(SessionStore):
+    """Keeps access data in JSON files
+
+    `path` may contain `{key}` to give each account its own file (e.g.
+    "sessions/{key}.json"), otherwise it holds a single session, saved as
+    "default", and other keys raise ValueError. Files are written atomically,
+    and all file I/O runs in a thread so it doesn't block the event loop.
+    """
+
+    def __init__(self, path: str = "session.json") -> None:
+        self.path = path
+
+    def _path(self, key: str) -> str:
+        if "{key}" not in self.path and key != "default":
+            raise ValueError(
+                f"{self.path!r} holds a single session, use a path containing "
+                f"{{key}} to save {key!r}"
+            )
+
+        return self.path.format(key=key)
+
+    def _read(self, path: str) -> Optional[dict]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".session-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def load(self, key: str = "default") -> Optional[dict]:
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def save(self, key: str, data: dict) -> None:
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(os.unlink, self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def keys(self) -> List[str]:
+        if "{key}" not in self.path:
+            return ["default"] if os.path.exists(self.path) else []
+
+        prefix, _, suffix = self.path.partition("{key}")
+        directory, start = os.path.split(prefix)
+        try:
+            names = await asyncio.to_thread(os.listdir, directory or ".")
+        except FileNotFoundError:
+            return []
+
+        return sorted(
+            name[len(start) : len(name) - len(suffix)]
+            for name in names
+            if name.startswith(start)
+            and name.endswith(suffix)
+            and len(name) > len(start) + len(suffix)
+        )
+
+
+class SQLiteSessionStore(SessionStore):
+    """Keeps the access data of any number of accounts in a SQLite database
+
+    Queries run in a thread so they don't block the event loop.
+    """
+
+    def __init__(self, path: str = "sessions.db") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _execute(self, query: str, params: tuple = ()) -> list:
+        with self._lock:
+            if self._db is None:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions "
+                    "(key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL)"
+                )
+
+            with self._db:
+                return self._db.execute(query, params).fetchall()
+
+    async def load(self, key: str = "default") -> Optional[dict]:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT data FROM sessions WHERE key = ?", (key,)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    async def save(self, key: str, data: dict) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO sessions (key, data, updated_at) VALUES (?, ?, ?)",
+            (key, json.dumps(data), time.time()),
+        )
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM sessions WHERE key = ?", (key,)
+        )
+
+    async def keys(self) -> List[str]:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT key FROM sessions ORDER BY key"
+        )
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
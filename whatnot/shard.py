@@ -0,0 +1,222 @@
+import asyncio
+import multiprocessing
+import os
+from queue import Empty
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from . import codec
+from .bulk import iter_bulk
+from .exc import WorkerError
+from .ratelimit import RateLimiter
+from .types import LiveStream, User
+
+# What a crawl can resolve: kind: (operation, variable, result field, model)
+KINDS = {
+    "user": ("GetUser", "username", "getUser", User),
+    "user_by_id": ("GetUserById", "id", "getUser", User),
+    "live": ("GetLivestreamContext", "id", "liveStream", LiveStream),
+}
+
+# Results sent back to the parent per queue message
+CHUNK_SIZE = 100
+
+# Longest the parent blocks a thread waiting for results, so a cancelled
+# crawl doesn't leave a thread stuck on the queue
+POLL_INTERVAL = 0.1
+
+
+class ShardResult:
+    """A crawled item as received from a worker, decoded on first access
+
+    `raw` is the serialized JSON of the response, `data` the decoded dict and
+    `model` the matching model (or None if the item wasn't found).
+    """
+
+    __slots__ = ("kind", "key", "raw", "error", "_data")
+
+    def __init__(
+        self, kind: str, key: str, raw: Optional[str], error: Optional[str]
+    ) -> None:
+        self.kind = kind
+        self.key = key
+        self.raw = raw
+        self.error = error
+        self._data = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def data(self) -> Optional[dict]:
+        if self._data is None and self.raw is not None:
+            self._data = codec.default_codec.loads(self.raw)
+
+        return self._data
+
+    @property
+    def model(self) -> Any:
+        return KINDS[self.kind][3](self.data) if self.data else None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"<ShardResult key={self.key!r} error={self.error!r}>"
+
+        return f"<ShardResult key={self.key!r}>"
+
+
+async def _crawl(
+    kind: str,
+    keys: list,
+    queue,
+    concurrency: int,
+    rate: Optional[float],
+    burst: int,
+    options: dict,
+) -> None:
+    from .whatnot import Whatnot
+
+    operation, variable, field, _ = KINDS[kind]
+    rate_limiter = RateLimiter(rate, burst) if rate else None
+
+    async with Whatnot(rate_limiter=rate_limiter, **options) as whatnot:
+
+        async def fetch(key: str) -> Optional[dict]:
+            return (await whatnot._req(operation, {variable: key}))[field]
+
+        chunk = []
+        async for result in iter_bulk(fetch, keys, concurrency):
+            chunk.append(
+                (
+                    result.key,
+                    whatnot.codec.dumps(result.value) if result.value else None,
+                    f"{type(result.error).__name__}: {result.error}"
+                    if result.error
+                    else None,
+                )
+            )
+
+            if len(chunk) >= CHUNK_SIZE:
+                queue.put(chunk)
+                chunk = []
+
+        if chunk:
+            queue.put(chunk)
+
+
+def _worker(
+    index: int,
+    kind: str,
+    keys: list,
+    queue,
+    concurrency: int,
+    rate: Optional[float],
+    burst: int,
+    options: dict,
+) -> None:
+    error = None
+
+    try:
+        asyncio.run(_crawl(kind, keys, queue, concurrency, rate, burst, options))
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        # Tell the parent this worker is done, and whether it failed
+        queue.put((index, error))
+
+
+async def crawl_sharded(
+    kind: str,
+    keys: Iterable[str],
+    processes: Optional[int] = None,
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+    burst: int = 10,
+    **options,
+) -> AsyncIterator[ShardResult]:
+    """Resolve many users or lives across worker processes, each with its own
+    Whatnot client
+
+    `kind` is one of `KINDS`. The keys are split evenly between `processes`
+    workers (default: one per CPU), which each make up to `concurrency`
+    requests at once. `rate` and `burst` are a global budget, divided evenly
+    between the workers. Other keyword arguments are passed to each worker's
+    `Whatnot`.
+
+    Workers send results back as JSON rather than pickled models; results
+    are yielded as they arrive, in no particular order. If a worker fails
+    outside of a single key (or dies), `WorkerError` is raised and the other
+    workers are stopped. Workers are spawned, so the calling script needs an
+    `if __name__ == "__main__":` guard.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}, expected one of {', '.join(KINDS)}")
+
+    keys = list(keys)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(keys)))
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(
+                i,
+                kind,
+                keys[i::processes],
+                queue,
+                concurrency,
+                rate / processes if rate else None,
+                max(1, burst // processes),
+                options,
+            ),
+            daemon=True,
+        )
+        for i in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    loop = asyncio.get_running_loop()
+    running = set(range(len(workers)))
+
+    # Workers seen to have exited without saying they were done. They get
+    # one more poll, in case their last message was still in the queue.
+    exited = set()
+
+    try:
+        while running:
+            try:
+                message = await loop.run_in_executor(
+                    None, queue.get, True, POLL_INTERVAL
+                )
+            except Empty:
+                for index in running & exited:
+                    raise WorkerError(
+                        f"Worker {index} exited with code {workers[index].exitcode}"
+                    )
+
+                exited.update(
+                    index for index in running if workers[index].exitcode is not None
+                )
+                continue
+
+            if isinstance(message, tuple):
+                index, error = message
+                running.discard(index)
+
+                if error is not None:
+                    raise WorkerError(f"Worker {index} failed: {error}")
+
+                continue
+
+            for key, raw, error in message:
+                yield ShardResult(kind, key, raw, error)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+            worker.join()
@@ -0,0 +1,84 @@
+import codecs
+import json
+import re
+from typing import AsyncIterable, AsyncIterator
+
+from gql.transport.exceptions import TransportProtocolError, TransportQueryError
+
+# Start of the first `edges` array. Keys inside JSON strings have their
+# quotes escaped, so they can't match.
+_EDGES = re.compile(r'"edges"\s*:\s*\[')
+
+_SKIP = " \t\r\n,"
+
+# Bytes read from the response at a time
+STREAM_CHUNK_SIZE = 16384
+
+
+async def iter_edges(chunks: AsyncIterable[bytes]) -> AsyncIterator[dict]:
+    """Yield the elements of the first `edges` array of a streamed GraphQL
+    response as soon as each one has been received
+
+    Only the element being received is kept in memory, rather than the whole
+    body. If the response has no `edges` array, its errors are raised.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+
+    buffer = ""
+    pos = None
+    done = False
+
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+
+        if pos is None:
+            match = _EDGES.search(buffer)
+
+            if not match:
+                continue
+
+            buffer = buffer[match.end() :]
+            pos = 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SKIP:
+                pos += 1
+
+            if pos >= len(buffer):
+                break
+
+            if buffer[pos] == "]":
+                done = True
+                break
+
+            try:
+                edge, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element hasn't been fully received yet
+                break
+
+            yield edge
+
+        if done:
+            return
+
+        buffer = buffer[pos:]
+        pos = 0
+
+    buffer += text_decoder.decode(b"", final=True)
+
+    if pos is not None:
+        raise TransportProtocolError("Response ended inside the edges array")
+
+    try:
+        result = json.loads(buffer)
+    except json.JSONDecodeError:
+        raise TransportProtocolError(
+            f"Server did not return a GraphQL result: {buffer}"
+        )
+
+    if result.get("errors"):
+        raise TransportQueryError(
+            str(result["errors"][0]), errors=result["errors"], data=result.get("data")
+        )
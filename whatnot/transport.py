@@ -0,0 +1,81 @@
+from typing import Any, Dict, Optional
+
+import aiohttp
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import (
+    TransportClosed,
+    TransportProtocolError,
+    TransportServerError,
+)
+from graphql import DocumentNode, ExecutionResult
+
+from . import queries
+
+
+class QueryTransport(AIOHTTPTransport):
+    """AIOHTTPTransport sending the cached text of each document
+
+    AIOHTTPTransport prints the document back into text on every request,
+    which costs about as much as parsing it. The text is instead printed
+    once per document, see `queries.persisted_query`.
+    """
+
+    async def execute(
+        self,
+        document: DocumentNode,
+        variable_values: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        upload_files: bool = False,
+    ) -> ExecutionResult:
+        if upload_files:
+            return await super().execute(
+                document, variable_values, operation_name, extra_args, upload_files
+            )
+
+        query, _, name = queries.persisted_query(document)
+
+        payload: Dict[str, Any] = {"query": query}
+        if operation_name or name:
+            payload["operationName"] = operation_name or name
+        if variable_values:
+            payload["variables"] = variable_values
+
+        return await self._post(payload, extra_args)
+
+    async def _post(
+        self, payload: Dict[str, Any], extra_args: Optional[Dict[str, Any]]
+    ) -> ExecutionResult:
+        """Send a request payload, handling the response like AIOHTTPTransport"""
+        if self.session is None:
+            raise TransportClosed("Transport is not connected")
+
+        post_args: Dict[str, Any] = {"json": payload}
+        if extra_args:
+            post_args.update(extra_args)
+
+        async with self.session.post(self.url, ssl=self.ssl, **post_args) as resp:
+            self.response_headers = resp.headers
+
+            try:
+                result = await resp.json(content_type=None)
+            except Exception:
+                result = None
+
+            if not isinstance(result, dict) or (
+                "errors" not in result and "data" not in result
+            ):
+                try:
+                    resp.raise_for_status()
+                except aiohttp.ClientResponseError as e:
+                    raise TransportServerError(str(e), e.status) from e
+
+                raise TransportProtocolError(
+                    f"Server did not return a GraphQL result: {await resp.text()}"
+                )
+
+            return ExecutionResult(
+                errors=result.get("errors"),
+                data=result.get("data"),
+                extensions=result.get("extensions"),
+            )
@@ -1,57 +1,159 @@
-import json
-from base64 import urlsafe_b64encode
+import sys
 from datetime import datetime, timezone
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from .utils import LiveStatuses, decode_id, images_url
+from . import codec
+from .utils import LiveStatuses, decode_id, image_url
+
+if TYPE_CHECKING:
+    from .identity import IdentityMap
+
+
+class Field:
+    """An attribute read from a model's raw data on first access
+
+    Values with a `convert` function are converted once and cached on the
+    instance, plain values are read straight from the raw data. `convert` can
+    be a model class, in which case the value (or each item of it, with
+    `many`) is built through the owner's identity map, if it has one. Strings
+    of `intern` fields are interned when the model is built, so values
+    repeated across responses (usernames, labels) share memory.
+    """
+
+    __slots__ = ("key", "convert", "many", "intern", "name", "model")
+
+    def __init__(
+        self,
+        key: str,
+        convert: Optional[Callable[[Any], Any]] = None,
+        many: bool = False,
+        intern: bool = False,
+    ):
+        self.key = key
+        self.convert = convert
+        self.many = many
+        self.intern = intern
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+        self.model = isinstance(self.convert, type) and issubclass(self.convert, Base)
+
+    def __get__(self, obj, objtype=None) -> Any:
+        if obj is None:
+            return self
+
+        cache = obj._cache
+        if cache is not None and self.name in cache:
+            return cache[self.name]
+
+        try:
+            value = obj._data[self.key]
+        except KeyError:
+            raise AttributeError(
+                f"{type(obj).__name__!r} object has no attribute {self.name!r}"
+            ) from None
+
+        if self.convert is None or value is None:
+            return value
+
+        if not self.model:
+            value = self.convert(value)
+        elif self.many:
+            value = [obj._build(self.convert, i) for i in value]
+        else:
+            value = obj._build(self.convert, value)
+
+        if cache is None:
+            cache = obj._cache = {}
+
+        cache[self.name] = value
+        return value
+
+    def __set__(self, obj, value: Any) -> None:
+        if obj._cache is None:
+            obj._cache = {}
+
+        obj._cache[self.name] = value
 
 
 class Base:
-    def __init__(self, data: dict) -> None:
+    __slots__ = ("_data", "_cache", "_identity", "__weakref__")
+
+    # Keys of the fields to intern
+    _interned: tuple = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._interned = tuple(
+            value.key
+            for value in vars(cls).values()
+            if isinstance(value, Field) and value.intern
+        )
+
+    def __init__(self, data: dict, identity: Optional["IdentityMap"] = None) -> None:
+        self._identity = identity
         self._from_data(data)
 
     def _from_data(self, data: dict):
-        pass
+        for key in self._interned:
+            value = data.get(key)
+
+            if type(value) is str:
+                data[key] = sys.intern(value)
+
+        self._data = data
+        self._cache = None
+
+    def _build(self, cls: type, data: dict) -> "Base":
+        """Build a nested model, reusing an existing instance if possible"""
+        if self._identity is not None:
+            return self._identity.get(cls, data)
+
+        return cls(data)
+
+
+def _strptime(format: str) -> Callable[[str], datetime]:
+    return lambda value: datetime.strptime(value, format)
+
+
+def _from_timestamp(value: str) -> datetime:
+    return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
 
 
 class Address(Base):
-    def _from_data(self, data: dict) -> None:
-        super()._from_data(data)
+    __slots__ = ()
 
-        self.city: str = data["city"]
-        self.full_name: str = data["fullName"]
-        self.line1: str = data["line1"]
-        self.line2: str = data["line2"]
-        self.postal_code: str = data["postalCode"]
-        self.state: str = data["state"]
+    city: str = Field("city")
+    full_name: str = Field("fullName")
+    line1: str = Field("line1")
+    line2: str = Field("line2")
+    postal_code: str = Field("postalCode")
+    state: str = Field("state")
 
     def __repr__(self) -> str:
         return f"<Address {self.postal_code}>"
 
 
 class AccountInfo(Base):
-    def _from_data(self, data: dict) -> None:
-        super()._from_data(data)
-
-        self.bio: Optional[str] = data["bio"]
-        self.can_go_live: bool = data["canGoLive"]
-        self.default_card: Optional[dict] = data["defaultCard"]
-        self.default_shipping_address: Optional[Address] = (
-            Address(data["defaultShippingAddress"])
-            if data["defaultShippingAddress"]
-            else None
-        )
-        self.direct_messaging_disabled: bool = data["directMessagingDisabled"]
-        self.email: str = data["email"]
-        self.first_name: str = data["firstName"]
-        self.home_address: Optional[dict] = data["homeAddress"]
-        self.id: str = decode_id(data["id"])
-        self.last_name: str = data["lastName"]
-        self.sales_tax_exempt: bool = data["salesTaxExempt"]
-        self.seller_approved: bool = data["sellerApproved"]
-        self.shipping_label_format: str = data["shippingLabelFormat"]
-        self.username: str = data["username"]
-        self.wallet_entries: list = data["walletEntries"]
+    __slots__ = ()
+
+    bio: Optional[str] = Field("bio")
+    can_go_live: bool = Field("canGoLive")
+    default_card: Optional[dict] = Field("defaultCard")
+    default_shipping_address: Optional[Address] = Field(
+        "defaultShippingAddress", Address
+    )
+    direct_messaging_disabled: bool = Field("directMessagingDisabled")
+    email: str = Field("email")
+    first_name: str = Field("firstName")
+    home_address: Optional[dict] = Field("homeAddress")
+    id: str = Field("id", decode_id)
+    last_name: str = Field("lastName")
+    sales_tax_exempt: bool = Field("salesTaxExempt")
+    seller_approved: bool = Field("sellerApproved")
+    shipping_label_format: str = Field("shippingLabelFormat")
+    username: str = Field("username")
+    wallet_entries: list = Field("walletEntries")
 
     def __repr__(self) -> str:
         return f"<AccountInfo>"
@@ -62,128 +164,128 @@ def card_metadata_string_bool(i: str) -> Optional[bool]:
 
 
 class CardMetadata(Base):
-    def _from_data(self, data: dict) -> None:
-        super()._from_data(data)
-        self.bin: str = data["bin"]
-        self.card_type: str = data["card_type"]
-        self.cardholder_name: Optional[str] = data["cardholder_name"]
-        self.created_at: datetime = datetime.strptime(
-            data["updated_at"], "%Y-%m-%d %H:%M:%S"
-        )
-        self.customer_id: str = data["customer_id"]
-        self.customer_global_id: str = data["customer_global_id"]
-        self.default: bool = data["default"]
-        self.expiration_month: str = data["expiration_month"]
-        self.expiration_year: str = data["expiration_year"]
-        self.expired: bool = data["expired"]
-        self.global_id: str = data["global_id"]
-        self.graphql_id: str = data["graphql_id"]
-        self.image_url: str = data["image_url"]
-        self.last_4: str = data["last_4"]
-        self.payment_instrument_name: str = data["payment_instrument_name"]
-        self.source_description: str = data["source_description"]
-        self.subscriptions: list = data["subscriptions"]
-        self.token: str = data["token"]
-        self.updated_at: datetime = datetime.strptime(
-            data["updated_at"], "%Y-%m-%d %H:%M:%S"
-        )
-        self.commercial: str = data["commercial"]
-        self.debit: bool = card_metadata_string_bool(data["debit"])
-        self.durbin_regulated: bool = card_metadata_string_bool(
-            data["durbin_regulated"]
-        )
-        self.healthcare: bool = card_metadata_string_bool(data["healthcare"])
-        self.payroll: bool = card_metadata_string_bool(data["payroll"])
-        self.prepaid: bool = card_metadata_string_bool(data["prepaid"])
-        self.product_id: str = data["product_id"]
-        self.country_of_issuance: str = data["country_of_issuance"]
-        self.issuing_bank: str = data["issuing_bank"]
-        self.gateway: Optional[str] = data["gateway"]
-        self.is_expired: bool = data["is_expired"]
+    __slots__ = ()
+
+    bin: str = Field("bin")
+    card_type: str = Field("card_type")
+    cardholder_name: Optional[str] = Field("cardholder_name")
+    created_at: datetime = Field("updated_at", _strptime("%Y-%m-%d %H:%M:%S"))
+    customer_id: str = Field("customer_id")
+    customer_global_id: str = Field("customer_global_id")
+    default: bool = Field("default")
+    expiration_month: str = Field("expiration_month")
+    expiration_year: str = Field("expiration_year")
+    expired: bool = Field("expired")
+    global_id: str = Field("global_id")
+    graphql_id: str = Field("graphql_id")
+    image_url: str = Field("image_url")
+    last_4: str = Field("last_4")
+    payment_instrument_name: str = Field("payment_instrument_name")
+    source_description: str = Field("source_description")
+    subscriptions: list = Field("subscriptions")
+    token: str = Field("token")
+    updated_at: datetime = Field("updated_at", _strptime("%Y-%m-%d %H:%M:%S"))
+    commercial: str = Field("commercial")
+    debit: bool = Field("debit", card_metadata_string_bool)
+    durbin_regulated: bool = Field("durbin_regulated", card_metadata_string_bool)
+    healthcare: bool = Field("healthcare", card_metadata_string_bool)
+    payroll: bool = Field("payroll", card_metadata_string_bool)
+    prepaid: bool = Field("prepaid", card_metadata_string_bool)
+    product_id: str = Field("product_id")
+    country_of_issuance: str = Field("country_of_issuance")
+    issuing_bank: str = Field("issuing_bank")
+    gateway: Optional[str] = Field("gateway")
+    is_expired: bool = Field("is_expired")
 
     def __repr__(self) -> str:
         return f"<CardMetadata>"
 
 
 class PaymentInfo(Base):
-    def _from_data(self, data: dict) -> None:
-        super()._from_data(data)
-        self.billing_address: Optional[dict] = (
-            Address(data["billingAddress"]) if data["billingAddress"] else None
-        )
-        self.card_description: str = data["cardDescription"]
-        self.card_metadata: dict = CardMetadata(json.loads(data["cardMetadata"]))
-        self.card_reference: str = data["cardReference"]
-        self.card_type: str = data["cardType"]
-        self.created_at: datetime = datetime.strptime(
-            data["createdAt"], "%a, %d %b %Y %H:%M:%S %Z"
-        )
-        self.customer_reference: str = data["customerReference"]
-        self.gateway: str = data["gateway"]
+    __slots__ = ()
+
+    billing_address: Optional[dict] = Field("billingAddress", Address)
+    card_description: str = Field("cardDescription")
+    card_metadata: dict = Field(
+        "cardMetadata", lambda value: CardMetadata(codec.default_codec.loads(value))
+    )
+    card_reference: str = Field("cardReference")
+    card_type: str = Field("cardType")
+    created_at: datetime = Field("createdAt", _strptime("%a, %d %b %Y %H:%M:%S %Z"))
+    customer_reference: str = Field("customerReference")
+    gateway: str = Field("gateway")
 
     def __repr__(self) -> str:
         return f"<PaymentInfo>"
 
 
 class User(Base):
-    def _from_data(self, data: dict) -> None:
-        super()._from_data(data)
-        self.id: str = decode_id(data["id"])
-        self.username: str = data["username"]
-        self.follower_count: str = data["followerCount"]
-        self.is_verified_seller: bool = data["isVerifiedSeller"]
-        self.profile_image: dict = data[
-            "profileImage"
-        ]  # Todo: auto-convert this to a URL
-        self.profile_url: str = f"{images_url}/{urlsafe_b64encode(json.dumps(self.profile_image).encode('utf-8')).decode('utf-8')}"
-        self.seller_rating: dict = data["sellerRating"]
-        self.user_following: bool = data["userFollowing"]
-        self.average_ship_days: Optional[int] = data["averageShipDays"]
-        self.bio: Optional[str] = data["bio"]
-        self.can_be_messaged_by_me: bool = data["canBeMessagedByMe"]
-        self.following_count: int = data["followingCount"]
-        self.sold_count: int = data["soldCount"]
+    __slots__ = ()
+
+    id: str = Field("id", decode_id)
+    username: str = Field("username", intern=True)
+    follower_count: str = Field("followerCount")
+    is_verified_seller: bool = Field("isVerifiedSeller")
+    profile_image: dict = Field("profileImage")
+    profile_url: str = Field("profileImage", image_url)
+    seller_rating: dict = Field("sellerRating")
+    user_following: bool = Field("userFollowing")
+    average_ship_days: Optional[int] = Field("averageShipDays")
+    bio: Optional[str] = Field("bio")
+    can_be_messaged_by_me: bool = Field("canBeMessagedByMe")
+    following_count: int = Field("followingCount")
+    sold_count: int = Field("soldCount")
+
+    def profile_image_url(
+        self,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        format: Optional[str] = None,
+    ) -> Optional[str]:
+        """Get the URL of the profile image, optionally resized or converted"""
+        if not self.profile_image:
+            return None
+
+        return image_url(self.profile_image, width, height, format)
 
     def __repr__(self) -> str:
-        return f"<User {self.username!r}>"
+        return f"<User {getattr(self, 'username', None)!r}>"
 
 
 class CategoryNode(Base):
-    def _from_data(self, data: dict) -> None:
-        self.id: str = data["id"]
-        self.label: str = data["label"]
+    __slots__ = ()
+
+    id: str = Field("id", intern=True)
+    label: str = Field("label", intern=True)
 
     def __repr__(self) -> str:
         return f"<CategoryNode {self.label!r}>"
 
 
 class LiveStream(Base):
-    def _from_data(self, data: dict) -> None:
-        self.active_viewers: int = data["activeViewers"]
-        self.categories: list = data["categories"]
-        self.category_nodes: list = [
-            CategoryNode(data=i) for i in data["categoryNodes"]
-        ]
-        self.explicit_content: bool = data["explicitContent"]
-        self.id: str = data["id"]
-        self.is_hidden_by_seller: bool = data["isHiddenBySeller"]
-        self.is_seller_international_to_buyer: bool = data[
-            "isSellerInternationalToBuyer"
-        ]
-        self.is_user_banned: bool = data["isUserBanned"]
-        self.is_user_moderator: bool = data["isUserModerator"]
-        self.nominatedModerators: list = [i["id"] for i in data["nominatedModerators"]]
-        self.pinned_product_id: Optional[str] = data["pinnedProductId"]
-        self.start_time: datetime = datetime.fromtimestamp(
-            int(data["startTime"]) / 1000, tz=timezone.utc
-        )
-        self.status = LiveStatuses(data["status"])
-        self.stream_token: str = data["streamToken"]
-        self.title: str = data["title"]
-        self.total_watchlist_users: int = data["totalWatchlistUsers"]
-        self.trailer_thumbnail_url: Optional[str] = data["trailerThumbnailUrl"]
-        self.trailer_url: Optional[str] = data["trailerUrl"]
-        self.user: dict = User(data["user"])
+    __slots__ = ()
+
+    active_viewers: int = Field("activeViewers")
+    categories: list = Field("categories")
+    category_nodes: list = Field("categoryNodes", CategoryNode, many=True)
+    explicit_content: bool = Field("explicitContent")
+    id: str = Field("id")
+    is_hidden_by_seller: bool = Field("isHiddenBySeller")
+    is_seller_international_to_buyer: bool = Field("isSellerInternationalToBuyer")
+    is_user_banned: bool = Field("isUserBanned")
+    is_user_moderator: bool = Field("isUserModerator")
+    nominatedModerators: list = Field(
+        "nominatedModerators", lambda value: [i["id"] for i in value]
+    )
+    pinned_product_id: Optional[str] = Field("pinnedProductId")
+    start_time: datetime = Field("startTime", _from_timestamp)
+    status: LiveStatuses = Field("status", LiveStatuses, intern=True)
+    stream_token: str = Field("streamToken")
+    title: str = Field("title")
+    total_watchlist_users: int = Field("totalWatchlistUsers")
+    trailer_thumbnail_url: Optional[str] = Field("trailerThumbnailUrl")
+    trailer_url: Optional[str] = Field("trailerUrl")
+    user: User = Field("user", User)
 
     def __repr__(self) -> str:
-        return f"<LiveStream id={self.id!r} title={self.title!r}>"
+        return f"<LiveStream id={self.id!r} title={getattr(self, 'title', None)!r}>"
@@ -1,5 +1,9 @@
-from base64 import b64decode
+import json
+import sys
+from base64 import b64decode, urlsafe_b64encode
 from enum import Enum
+from functools import lru_cache
+from typing import Optional
 
 base_url = "https://www.whatnot.com"
 api_url = "https://api.whatnot.com/api/v2"
@@ -14,8 +18,47 @@ class LiveStatuses(Enum):
     ENDED = "ENDED"
 
 
-def decode_id(id_: str) -> int:
+@lru_cache(maxsize=65536)
+def decode_id(id_: str) -> str:
     if id_.isdigit():
         return id_
 
-    return b64decode(id_).decode("utf-8").split(":", 1)[1]
+    return sys.intern(b64decode(id_).decode("utf-8").split(":", 1)[1])
+
+
+def image_url(
+    image: dict,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    format: Optional[str] = None,
+) -> str:
+    """Build the images.whatnot.com URL of an image (e.g. `User.profile_image`)
+
+    Optionally resized to `width`/`height` and converted to `format` (e.g.
+    "webp")
+    """
+    return _image_url(tuple(image.items()), width, height, format)
+
+
+@lru_cache(maxsize=16384)
+def _image_url(
+    image: tuple, width: Optional[int], height: Optional[int], format: Optional[str]
+) -> str:
+    payload = dict(image)
+    edits = {}
+
+    if width or height:
+        edits["resize"] = {
+            name: value
+            for name, value in (("width", width), ("height", height))
+            if value
+        }
+
+    if format:
+        edits["toFormat"] = format
+
+    if edits:
+        payload["edits"] = edits
+
+    # Always the stdlib encoder, so the URL doesn't depend on the codec
+    return f"{images_url}/{urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('utf-8')}"
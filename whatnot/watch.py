@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, Optional
+
+from .retry import transient
+from .utils import LiveStatuses
+
+if TYPE_CHECKING:
+    from .whatnot import Whatnot
+
+# How often to poll a stream in each status, as multiples of the base interval
+INTERVAL_MULTIPLIERS = {
+    LiveStatuses.LIVE: 1,
+    LiveStatuses.CREATED: 6,
+    LiveStatuses.ENDED: 60,
+}
+
+# Polled fields and the LiveStream attributes they are reported as
+WATCHED_FIELDS = {
+    "status": "status",
+    "activeViewers": "active_viewers",
+    "pinnedProductId": "pinned_product_id",
+}
+
+
+class LiveEvent:
+    """A change to a watched livestream
+
+    `old` is None for the first snapshot of a stream. If a stream can't be
+    fetched, `field` is "error" and `new` the exception.
+    """
+
+    __slots__ = ("live_id", "field", "old", "new", "timestamp")
+
+    def __init__(self, live_id: str, field: str, old: Any, new: Any) -> None:
+        self.live_id = live_id
+        self.field = field
+        self.old = old
+        self.new = new
+        self.timestamp = time.time()
+
+    @property
+    def delta(self) -> Optional[int]:
+        """The change in viewers, for `active_viewers` events"""
+        if self.field != "active_viewers" or self.old is None:
+            return None
+
+        return self.new - self.old
+
+    def __repr__(self) -> str:
+        return f"<LiveEvent live_id={self.live_id!r} {self.field}: {self.old!r} -> {self.new!r}>"
+
+
+def _diff(
+    live_id: str, old: Optional[dict], new: dict, min_viewer_delta: int
+) -> Iterable[LiveEvent]:
+    for key, field in WATCHED_FIELDS.items():
+        before = old[key] if old else None
+        after = new[key]
+
+        if old and before == after:
+            continue
+
+        if (
+            old
+            and key == "activeViewers"
+            and before is not None
+            and after is not None
+            and abs(after - before) < min_viewer_delta
+        ):
+            continue
+
+        if key == "status":
+            before = LiveStatuses(before) if before else None
+            after = LiveStatuses(after)
+
+        yield LiveEvent(live_id, field, before, after)
+
+
+async def watch_lives(
+    whatnot: "Whatnot",
+    ids: Iterable[str],
+    interval: float = 5.0,
+    multipliers: Optional[Dict[LiveStatuses, float]] = None,
+    batch_size: int = 50,
+    min_viewer_delta: int = 1,
+) -> AsyncIterator[LiveEvent]:
+    """Poll livestreams and yield an event whenever a watched field changes
+
+    Only the fields in `LIVE_STATUS_QUERY` are fetched, `batch_size` streams
+    per request. Each stream is polled every `interval` seconds times the
+    multiplier for its status, so live streams are polled often and ended
+    ones rarely. Viewer changes smaller than `min_viewer_delta` since the
+    last reported count are ignored.
+
+    Transient errors (see `retry.transient`) are retried after `interval`,
+    other request errors are raised. A stream that fails with its own
+    GraphQL error gets an "error" event and is no longer watched.
+    """
+    multipliers = {**INTERVAL_MULTIPLIERS, **(multipliers or {})}
+    next_poll = {live_id: 0.0 for live_id in ids}
+    snapshots: Dict[str, dict] = {}
+
+    while next_poll:
+        now = time.monotonic()
+        due = [live_id for live_id, at in next_poll.items() if at <= now]
+
+        if not due:
+            await asyncio.sleep(min(next_poll.values()) - now)
+            continue
+
+        chunks = [due[i : i + batch_size] for i in range(0, len(due), batch_size)]
+        results = await asyncio.gather(
+            *(whatnot._req_batch("GetLivestreamStatus", chunk) for chunk in chunks),
+            return_exceptions=True,
+        )
+
+        now = time.monotonic()
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                if not transient(result):
+                    raise result
+
+                result = [None] * len(chunk)
+
+            for live_id, data in zip(chunk, result):
+                if isinstance(data, BaseException):
+                    del next_poll[live_id]
+                    yield LiveEvent(live_id, "error", None, data)
+                    continue
+
+                # Try again after the base interval if the stream couldn't be fetched
+                if not data:
+                    next_poll[live_id] = now + interval
+                    continue
+
+                old = snapshots.get(live_id)
+                snapshot = dict(data)
+                viewers_reported = False
+
+                for event in _diff(live_id, old, data, min_viewer_delta):
+                    viewers_reported |= event.field == "active_viewers"
+                    yield event
+
+                # Keep the last reported viewer count, so small changes add up
+                if old and not viewers_reported:
+                    snapshot["activeViewers"] = old["activeViewers"]
+
+                snapshots[live_id] = snapshot
+                next_poll[live_id] = now + interval * multipliers.get(
+                    LiveStatuses(data["status"]), 1
+                )
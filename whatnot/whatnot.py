@@ -1,17 +1,42 @@
+import asyncio
 import json
-from functools import wraps
-from typing import Any, Union
-from uuid import uuid4
 import time
+from functools import partial, wraps
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Tuple,
+    Union,
+)
+from uuid import uuid4
 
 import aiohttp
-from gql import Client, gql
-from gql.transport.aiohttp import AIOHTTPTransport
+from gql import Client
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+from graphql import DocumentNode
 
 from . import queries
+from .apq import PersistedQueryTransport
+from .batch import BatchLoader
+from .bulk import BulkResult, BulkResults, BulkStats, gather_bulk, iter_bulk
+from .cache import ResponseCache
+from .codec import get_codec, response_class
 from .exc import *
+from .hooks import RequestHooks, RequestInfo, current_request, trace_config
+from .identity import IdentityMap
+from .ratelimit import RETRY_STATUSES, RateLimiter, retry_after
+from .realtime import LiveSubscriptions
+from .retry import RetryPolicy
+from .sessions import FileSessionStore, SessionStore
+from .stream import STREAM_CHUNK_SIZE, iter_edges
+from .transport import QueryTransport
 from .types import *
 from .utils import *
+from .watch import LiveEvent, watch_lives
 
 
 # Authentication decorator
@@ -27,7 +52,30 @@ def login_required(func) -> callable:
 
 
 class Whatnot:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        lazy_queries: bool = True,
+        batching: bool = False,
+        max_batch_size: int = 50,
+        batch_delay: float = 0.005,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        ttl_dns_cache: Optional[int] = 10,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        hooks: Iterable[RequestHooks] = (),
+        gql_url: str = gql_url,
+        api_url: str = api_url,
+        json_codec: str = "auto",
+        identity_map: bool = False,
+        auto_refresh: bool = True,
+        refresh_margin: float = 60,
+        session_store: Optional[SessionStore] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        persisted_queries: bool = False,
+    ) -> None:
         HEADERS = {
             "Apollographql-Client-Name": "web",
             "Apollographql-Client-Version": "20230710-1529",
@@ -38,24 +86,96 @@ class Whatnot:
             "X-Whatnot-App-Version": "20230710-1529",
         }
 
-        # GQL client
-        self.transport = AIOHTTPTransport(
-            url=gql_url,
-            headers=HEADERS
-        )
-        
+        self.headers = HEADERS
+
+        # Endpoints, overridable e.g. to point at a local mock server
+        self.gql_url = gql_url
+        self.api_url = api_url
+
+        # Connection pool shared by GraphQL and REST requests, created on
+        # connect unless one is passed in (e.g. to share it between clients)
+        self.connector = connector
+        self._owns_connector = connector is None
+        self._connector_options = {
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": ttl_dns_cache,
+        }
+
+        # JSON implementation for request and response bodies, see codec.CODECS
+        self.codec = get_codec(json_codec)
+        self._response_class = response_class(self.codec)
+
+        # GQL client, sending the cached text of each query, or its hash
+        # instead with `persisted_queries`
+        self.transport = (
+            PersistedQueryTransport if persisted_queries else QueryTransport
+        )(url=self.gql_url, headers=HEADERS, json_serialize=self.codec.dumps)
+
         self.client = Client(
             transport=self.transport,
             fetch_schema_from_transport=False,
         )
 
         # HTTP session
-        self.session = aiohttp.ClientSession(
-            headers=HEADERS,
-        )
+        self.session = None
+
+        # Client-side rate limiting and 429/503 backoff, off unless given
+        self.rate_limiter = rate_limiter
+
+        # Timeouts, retries of transient errors and hedging, off unless given
+        self.retry_policy = retry_policy
+
+        # Response cache for registered operations, off unless given
+        self.cache = cache
+
+        # Instrumentation callbacks, e.g. a LatencyHistogram
+        self.hooks = list(hooks)
+
+        # Share model instances of the same entity between responses
+        self.identity = IdentityMap() if identity_map else None
 
         self.access_data = None
 
+        # Refresh the access token in the background `refresh_margin` seconds
+        # before it expires
+        self.auto_refresh = auto_refresh
+        self.refresh_margin = refresh_margin
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Counts completed refreshes, so callers that waited on another's
+        # refresh know to skip theirs
+        self._refresh_generation = 0
+
+        # Where load_session/save_session keep access data, and the account
+        # it was last loaded or saved as, so refreshed tokens are saved too
+        self.session_store = session_store or FileSessionStore()
+        self._session_key: Optional[str] = None
+
+        # Connected GQL session, shared by concurrent requests
+        self._gql_session = None
+        self._connect_lock = asyncio.Lock()
+
+        # Parse every operation now rather than on first use
+        if not lazy_queries:
+            queries.compile_all()
+
+        # Coalesce concurrent lookups into aliased operations
+        self._loaders = (
+            {
+                name: BatchLoader(
+                    partial(self._req_batch, name),
+                    max_batch_size=max_batch_size,
+                    delay=batch_delay,
+                )
+                for name in queries.BATCHES
+            }
+            if batching
+            else {}
+        )
+
     async def __aenter__(self) -> "Whatnot":
         """Enter the context manager"""
         return self
@@ -65,44 +185,255 @@ class Whatnot:
 
     async def close(self) -> None:
         """Close the session"""
-        await self.session.close()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+        if self._gql_session:
+            # The transport leaves its session open when it doesn't own the
+            # connector, so close it here
+            transport_session = self.transport.session
+            await self.client.close_async()
+            await transport_session.close()
+            self._gql_session = None
+
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+        if self.connector and self._owns_connector:
+            await self.connector.close()
+            self.connector = None
+
+    async def _connect(self):
+        """Open the connection pool, HTTP session and GQL session once"""
+        async with self._connect_lock:
+            if not self.connector:
+                self.connector = aiohttp.TCPConnector(**self._connector_options)
+
+            if not self.session:
+                self.session = aiohttp.ClientSession(
+                    headers=self.headers,
+                    connector=self.connector,
+                    connector_owner=False,
+                    trace_configs=[trace_config()] if self.hooks else None,
+                    json_serialize=self.codec.dumps,
+                    response_class=self._response_class,
+                )
+
+            if not self._gql_session:
+                self.transport.client_session_args = {
+                    "connector": self.connector,
+                    "connector_owner": False,
+                    "trace_configs": [trace_config()] if self.hooks else None,
+                    "response_class": self._response_class,
+                }
+                self._gql_session = await self.client.connect_async()
+
+        return self._gql_session
+
+    async def _refresh_expired(self) -> None:
+        """Refresh an expired access token before using it"""
+        if (
+            self.access_data
+            and self.access_data["access_token"]["expires_at"] <= time.time()
+        ):
+            await self.refresh()
 
     async def _req(self, query: str, variables: Optional[dict] = None) -> dict:
-        """Make a request to the GraphQL endpoint"""
-        # --- NOT WORKING CURRENTLY ---
-        # # If logged in, check if the access token is expired
-        # if self.access_data:
-        #     if self.access_data["access_token"]["expires_at"] <= time.time():
-        #         # Refresh the access token
-        #         async with aiohttp.ClientSession(
-        #             headers=self.HEADERS,
-        #             cookies={
-        #                 "accessToken": self.access_data["access_token"]["token"],
-        #                 "refreshToken": self.access_data["refresh_token"]["token"],
-        #                 "accessTokenExpires": self.access_data["refresh_token"]["expires_at"],
-        #             }
-        #         ) as session:
-        #             async with session.post(
-        #                 f"{api_url}/refresh",
-        #                 json={},
-        #                 headers={
-        #                     **session.headers,
-        #                     "Authorization": f"Bearer {self.access_data['refresh_token']['token']}"
-        #                 },
-        #             ) as resp:
-        #                 print(await resp.json())
-        #                 resp.raise_for_status()
-        #                 data = await resp.json()
-        #                 await self.login_with_access_data(data)
-
-        #     # Add the access token to the headers
-        #     self.session.headers[
-        #         "Authorization"
-        #     ] = f"Bearer {self.access_data['access_token']['token']}"
-
-        return await self.client.execute_async(
-            gql(query), variable_values=variables
+        """Make a request to the GraphQL endpoint
+
+        `query` is either the name of an operation in `queries.OPERATIONS` or
+        the text of an ad-hoc query
+        """
+        await self._refresh_expired()
+
+        if query in queries.OPERATIONS:
+            document = queries.get_document(query)
+            operation = query
+        else:
+            document = queries.parse(query)
+            operation = queries.operation_name(document)
+
+        if self.cache and query in queries.OPERATIONS:
+            return await self.cache.fetch(
+                query,
+                variables,
+                partial(self._execute, document, variables, operation),
+                user_id=self.access_data["user_id"] if self.access_data else None,
+            )
+
+        return await self._execute(document, variables, operation)
+
+    async def _execute(
+        self,
+        document: DocumentNode,
+        variables: Optional[dict] = None,
+        operation: Optional[str] = None,
+    ) -> dict:
+        """Send a parsed document, backing off and retrying if rate limited,
+        and applying the retry policy"""
+        session = self._gql_session or await self._connect()
+        policy = self.retry_policy
+        idempotent = policy is not None and queries.is_query(document)
+
+        attempt = 0
+        retries = 0
+        while True:
+            try:
+                if policy is None:
+                    return await self._send(
+                        session, document, variables, operation, attempt
+                    )
+
+                return await policy.run(
+                    partial(
+                        self._send, session, document, variables, operation, attempt
+                    ),
+                    operation,
+                    idempotent,
+                )
+            except Exception as e:
+                if (
+                    self.rate_limiter
+                    and isinstance(e, TransportServerError)
+                    and e.code in RETRY_STATUSES
+                    and attempt < self.rate_limiter.max_retries
+                ):
+                    self.rate_limiter.backoff(attempt, retry_after(e))
+                elif (
+                    idempotent and retries < policy.max_retries and policy.retryable(e)
+                ):
+                    await asyncio.sleep(policy.backoff(retries))
+                    retries += 1
+                else:
+                    raise
+
+                attempt += 1
+
+    async def _send(
+        self,
+        session,
+        document: DocumentNode,
+        variables: Optional[dict],
+        operation: Optional[str],
+        attempt: int = 0,
+    ) -> dict:
+        """Send a single request, reporting it to the request hooks
+
+        The retry policy's timeout starts once the rate limiter lets the
+        request through
+        """
+        if not self.hooks:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+
+            return await self._timed(
+                session.execute(document, variable_values=variables), operation
+            )
+
+        info = RequestInfo(
+            operation, len(json.dumps(variables)) if variables else 0, attempt
+        )
+        token = current_request.set(info)
+
+        for hook in self.hooks:
+            hook.on_request_start(info)
+
+        try:
+            if self.rate_limiter:
+                info.begin("queue")
+                await self.rate_limiter.acquire()
+                info.end("queue")
+
+            result = await self._timed(
+                session.execute(document, variable_values=variables), operation
+            )
+        except BaseException as e:
+            # Including attempts cancelled by a faster hedge, which are
+            # flagged as such, see RequestInfo.cancelled
+            info.finish(e)
+
+            for hook in self.hooks:
+                hook.on_request_error(info, e)
+
+            raise
+        finally:
+            current_request.reset(token)
+
+        info.finish()
+
+        for hook in self.hooks:
+            hook.on_request_end(info)
+
+        return result
+
+    def _timed(self, request: Awaitable, operation: Optional[str]) -> Awaitable:
+        """Apply the retry policy's timeout to a request, if there is one"""
+        if self.retry_policy is None:
+            return request
+
+        return self.retry_policy.timed(request, operation)
+
+    async def _req_batch(self, name: str, keys: list) -> list:
+        """Fetch many items of a batchable operation in a single request"""
+        prefix = queries.BATCHES[name][0]
+        errors = {}
+
+        try:
+            data = await self._req(
+                queries.batch_query(name, len(keys)),
+                {f"v{i}": key for i, key in enumerate(keys)},
+            )
+        except TransportQueryError as e:
+            if not e.data:
+                raise
+
+            # Hand each error to the item it belongs to
+            data = e.data
+            for error in e.errors or ():
+                if error.get("path"):
+                    errors[error["path"][0]] = TransportQueryError(
+                        str(error), errors=[error], data=None
+                    )
+
+        return [
+            errors.get(f"{prefix}{i}") or data.get(f"{prefix}{i}")
+            for i in range(len(keys))
+        ]
+
+    async def _fetch(self, query: str, variables: dict, field: str, key: Any) -> Any:
+        """Fetch the `field` of a single item, through the batch loader of the
+        operation when batching
+
+        Batched items are cached (and deduplicated) per item, under the same
+        key as an unbatched request
+        """
+        loader = self._loaders.get(query)
+
+        if loader is None:
+            return (await self._req(query, variables))[field]
+
+        if not self.cache:
+            return await loader.load(key)
+
+        async def load() -> dict:
+            return {field: await loader.load(key)}
+
+        response = await self.cache.fetch(
+            query,
+            variables,
+            load,
+            user_id=self.access_data["user_id"] if self.access_data else None,
         )
+        return response[field]
+
+    def _model(self, cls: type, data: dict) -> Any:
+        """Build a model, through the identity map if enabled"""
+        if self.identity is not None:
+            return self.identity.get(cls, data)
+
+        return cls(data)
 
     def __repr__(self) -> str:
         return f"<Whatnot user_id={self.access_data['user_id']!r})>"
@@ -124,10 +455,91 @@ class Whatnot:
 
         self.access_data = access_data
 
+        # Send the access token with every request
+        authorization = f"Bearer {access_data['access_token']['token']}"
+        self.headers["Authorization"] = authorization
+
+        for session in (self.session, self.transport.session):
+            if session:
+                session.headers["Authorization"] = authorization
+
+        if self.auto_refresh and not self._refresh_task:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def refresh(self) -> None:
+        """Get a new access token using the refresh token
+
+        Concurrent callers share a single refresh
+        """
+        generation = self._refresh_generation
+
+        async with self._refresh_lock:
+            # Someone else refreshed the token while we were waiting
+            if self._refresh_generation != generation:
+                return
+
+            await self._connect()
+
+            async with self.session.post(
+                f"{self.api_url}/refresh",
+                json={},
+                headers={
+                    "Authorization": f"Bearer {self.access_data['refresh_token']['token']}"
+                },
+                cookies={
+                    "accessToken": self.access_data["access_token"]["token"],
+                    "refreshToken": self.access_data["refresh_token"]["token"],
+                    "accessTokenExpires": str(
+                        self.access_data["refresh_token"]["expires_at"]
+                    ),
+                },
+            ) as resp:
+                if resp.status in (400, 401, 403):
+                    raise AuthenticationFailed("Refresh token was rejected")
+
+                resp.raise_for_status()
+                data = await resp.json()
+
+            # Keep what the refresh response doesn't include
+            for key in ("refresh_token", "user_id"):
+                if key not in data and key in self.access_data:
+                    data[key] = self.access_data[key]
+
+            await self.login_with_access_data(data)
+            self._refresh_generation += 1
+
+            if self._session_key is not None:
+                await self.session_store.save(self._session_key, self.access_data)
+
+    async def _refresh_loop(self) -> None:
+        """Refresh the access token shortly before it expires, for as long as
+        we are logged in"""
+        while self.access_data:
+            delay = (
+                self.access_data["access_token"]["expires_at"]
+                - self.refresh_margin
+                - time.time()
+            )
+            await asyncio.sleep(max(delay, 1))
+
+            try:
+                await self.refresh()
+            except AuthenticationFailed:
+                # The refresh token was rejected, so trying again won't help;
+                # requests raise once the access token has expired
+                self._refresh_task = None
+                return
+            except Exception:
+                # Requests will refresh (and raise) themselves once the token
+                # has expired, so just try again later
+                await asyncio.sleep(min(self.refresh_margin, 30))
+
     async def _verify(self, token: str, code: Union[str, int], device_id: str) -> None:
         """Handles email/SMS verification"""
+        await self._connect()
+
         async with self.session.post(
-            f"{api_url}/verify",
+            f"{self.api_url}/verify",
             json={
                 "device_id": device_id,
                 "code": code,
@@ -144,9 +556,10 @@ class Whatnot:
     ) -> None:
         """Log in using a email and password"""
         device_id = str(uuid4())
+        await self._connect()
 
         async with self.session.post(
-            f"{api_url}/login",
+            f"{self.api_url}/login",
             json={
                 "device_id": device_id,
                 "email": username,
@@ -179,124 +592,386 @@ class Whatnot:
                     f"Unimplemented verification method: {data.get('verification_method')}"
                 )
 
-    async def load_session(self) -> None:
-        """Load a saved session"""
-        with open("session.json", "r") as f:
-            data = json.load(f)
+    async def load_session(self, key: str = "default") -> None:
+        """Load a saved session from the session store"""
+        data = await self.session_store.load(key)
 
-            await self.login_with_access_data(data)
+        if data is None:
+            raise AuthenticationRequired(f"No saved session for {key!r}")
+
+        await self.login_with_access_data(data)
+        self._session_key = key
 
-    async def save_session(self) -> None:
-        """Save the session to 2 files: session.json and cookie_jar.pickle"""
-        with open("session.json", "w") as f:
-            json.dump(self.access_data, f)
+    async def save_session(self, key: str = "default") -> None:
+        """Save the session to the session store (session.json by default)"""
+        await self.session_store.save(key, self.access_data)
+        self._session_key = key
 
     """Account Info"""
 
     @login_required
     async def get_account_info(self) -> AccountInfo:
         """Get your account information"""
-        # query = (
-        #     """
-        #         query UserInfo {
-        #         """
-        #     + queries.ME_QUERY
-        #     + "}"
-        # )
-
-        query = "query UserInfo {\n  me {\n    id\n    bio\n    email\n    phoneNumber\n    firstName\n    lastName\n    displayName\n    canGoLive\n    salesTaxExempt\n    username\n    directMessagingDisabled\n    hasMarketplaceAccess\n    sellerProfileClipsHidden\n    sellerProfileVodsHidden\n    activityStatusEnabled\n    shippingLabelFormat\n    profileImage {\n      id\n      bucket\n      key\n      __typename\n    }\n    defaultCard {\n      customerReference\n      cardMetadata\n      __typename\n    }\n    defaultShippingAddress {\n      fullName\n      postalCode\n      line1\n      line2\n      city\n      state\n      countryCode\n      __typename\n    }\n    homeAddress {\n      fullName\n      postalCode\n      line1\n      line2\n      city\n      state\n      countryCode\n      __typename\n    }\n    walletEntries {\n      address\n      chainType\n      __typename\n    }\n    __typename\n  }\n}"
-
-        print(
-            await self._req(
-                query,
-                {
-
-
-
-                },
-            )
-        )
-        return (await self._req(query))["me"]
+        return (await self._req("UserInfo"))["me"]
 
     @login_required
     async def get_default_payment(self) -> PaymentInfo:
         """Get your default payment information"""
-        query = (
-            """
-                query GetPaymentInfo {
-                """
-            + queries.ME_PAYMENT_QUERY
-            + "}"
-        )
+        resp = (await self._req("GetPaymentInfo"))["userDefaultPayment"]
+
+        if not resp:
+            return None
 
-        resp = (await self._req(query))["userDefaultPayment"]
+        payment = PaymentInfo(resp)
 
-        return PaymentInfo(resp) if resp else None
+        # Decode the card metadata with this client's codec
+        if resp.get("cardMetadata") is not None:
+            payment.card_metadata = CardMetadata(self.codec.loads(resp["cardMetadata"]))
+
+        return payment
 
     """Users"""
 
-    async def get_user(self, username: str) -> User:
-        """Get a user by their username"""
-        query = (
-            """
-                query GetUser($username: String) {
-                    getUser(username: $username) {
-                """
-            + queries.USER_QUERY
-            + "}}"
+    async def get_user(
+        self, username: str, fields: Union[str, Iterable[str], None] = None
+    ) -> User:
+        """Get a user by their username
+
+        `fields` limits the fields fetched, see `queries.project`
+        """
+        query = queries.project("GetUser", fields)
+
+        result = await self._fetch(query, {"username": username}, "getUser", username)
+
+        return self._model(User, result) if result else None
+
+    async def get_user_by_id(
+        self, id_: str, fields: Union[str, Iterable[str], None] = None
+    ) -> User:
+        """Get a user by their id
+
+        `fields` limits the fields fetched, see `queries.project`
+        """
+        query = queries.project("GetUserById", fields)
+
+        result = await self._fetch(query, {"id": id_}, "getUser", id_)
+
+        return self._model(User, result) if result else None
+
+    async def get_users_by_id(
+        self, ids: Iterable[str], concurrency: int = 10
+    ) -> BulkResults:
+        """Get many users by their ids, with at most `concurrency` requests at once
+
+        Results are returned in the order of `ids`, with failures reported
+        per item
+        """
+        return await gather_bulk(self.get_user_by_id, ids, concurrency)
+
+    def iter_users_by_id(
+        self,
+        ids: Iterable[str],
+        concurrency: int = 10,
+        stats: Optional[BulkStats] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Get many users by their ids, yielding results as they complete"""
+        return iter_bulk(self.get_user_by_id, ids, concurrency, stats)
+
+    async def get_user_lives(
+        self,
+        user_id: str,
+        first: int = 6,
+        fields: Union[str, Iterable[str], None] = None,
+    ) -> list[LiveStream]:
+        """Get a user's lives by their id
+
+        `fields` limits the fields fetched, see `queries.project`
+        """
+        result = await self._req(
+            queries.project("GetUserLiveStreams", fields),
+            {"first": first, "userId": user_id},
         )
+        return [
+            self._model(LiveStream, i["node"])
+            for i in result["searchLivestreams"]["edges"]
+        ]
+
+    async def iter_user_lives(
+        self,
+        user_id: str,
+        page_size: int = 20,
+        prefetch: bool = False,
+        fields: Union[str, Iterable[str], None] = None,
+    ) -> AsyncIterator[LiveStream]:
+        """Iterate over all of a user's lives, fetching them a page at a time"""
+        async for node in self._paginate(
+            queries.project("GetUserLiveStreamsPage", fields),
+            {"userId": user_id},
+            lambda data: data["searchLivestreams"],
+            page_size,
+            prefetch,
+        ):
+            yield self._model(LiveStream, node)
+
+    async def stream_user_lives(
+        self,
+        user_id: str,
+        first: int = 100,
+        fields: Union[str, Iterable[str], None] = None,
+    ) -> AsyncIterator[LiveStream]:
+        """Get a user's lives, yielding each one as soon as it is received
+
+        Unlike `get_user_lives`, the response is decoded incrementally, so
+        large values of `first` don't need the whole body in memory
+        """
+        async for edge in self._stream_edges(
+            queries.project("GetUserLiveStreams", fields),
+            {"first": first, "userId": user_id},
+        ):
+            yield self._model(LiveStream, edge["node"])
 
-        result = (await self._req(query, {"username": username}))["getUser"]
-        return User(result) if result else None
-
-    async def get_user_by_id(self, id_: str) -> User:
-        """Get a user by their id"""
-        query = (
-            """
-            query GetUser($id: ID) {
-                getUser(id: $id) {
-            """
-            + queries.USER_QUERY
-            + "}}"
-        )
+    """Lives"""
 
-        result = (await self._req(query, {"id": id_}))["getUser"]
-        return User(result) if result else None
-
-    async def get_user_lives(self, user_id: str, first: int = 6) -> list[LiveStream]:
-        """Get a user's lives by their id"""
-        query = (
-            """
-            query GetUserLiveStreams($userId: ID!, $first: Int) {
-                searchLivestreams(userIds: [$userId], first: $first) {
-                    edges {
-                        node {
-                            ... on LiveStream {"""
-            + queries.LIVE_QUERY
-            + "}}}}}"
-        )
+    async def get_live(
+        self, id_: str, fields: Union[str, Iterable[str], None] = None
+    ) -> LiveStream:
+        """Get a livestream by ID
 
-        result = await self._req(query, {"first": first, "userId": user_id})
-        return [LiveStream(i["node"]) for i in result["searchLivestreams"]["edges"]]
+        `fields` limits the fields fetched, see `queries.project`
+        """
+        query = queries.project("GetLivestreamContext", fields)
 
-    """Lives"""
+        result = await self._fetch(query, {"id": id_}, "liveStream", id_)
 
-    async def get_live(self, id_: str) -> LiveStream:
-        """Get a livestream by ID"""
-        query = (
-            """
-            query GetLivestreamContext($id: ID!, $userId: ID) {
-                liveStream(id: $id) {
-                    ...LivestreamFragment
-                }
-            }
+        return self._model(LiveStream, result) if result else None
 
-            fragment LivestreamFragment on LiveStream {"""
-            + queries.LIVE_QUERY
-            + "}"
-        )
+    async def get_lives(self, ids: Iterable[str], concurrency: int = 10) -> BulkResults:
+        """Get many livestreams by ID, with at most `concurrency` requests at once
+
+        Results are returned in the order of `ids`, with failures reported
+        per item
+        """
+        return await gather_bulk(self.get_live, ids, concurrency)
+
+    def iter_lives(
+        self,
+        ids: Iterable[str],
+        concurrency: int = 10,
+        stats: Optional[BulkStats] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Get many livestreams by ID, yielding results as they complete"""
+        return iter_bulk(self.get_live, ids, concurrency, stats)
+
+    def watch_lives(
+        self, ids: Iterable[str], interval: float = 5.0, **kwargs
+    ) -> AsyncIterator[LiveEvent]:
+        """Watch livestreams for status, viewer and pinned product changes
+
+        See `watch.watch_lives` for the other options
+        """
+        return watch_lives(self, ids, interval, **kwargs)
 
-        result = await self._req(query, {"id": id_})
-        return LiveStream(result["liveStream"]) if result else None
+    def live_subscriptions(self, **kwargs) -> LiveSubscriptions:
+        """Receive chat, bid, pinned product and viewer events of livestreams
+        over a WebSocket, instead of polling
+
+        See `realtime.LiveSubscriptions` for the options
+        """
+        return LiveSubscriptions(self, **kwargs)
 
     """Recommendations/Saved Streams/etcs"""
+
+    async def iter_for_you(
+        self, page_size: int = 10, prefetch: bool = False
+    ) -> AsyncIterator[LiveStream]:
+        """Iterate over the lives in the For You feed, a page of sections at a time"""
+        async for section in self._paginate(
+            "GetForYou",
+            {},
+            lambda data: data["forYou"]["sections"],
+            page_size,
+            prefetch,
+        ):
+            for edge in section["contents"]["edges"]:
+                if edge["node"]["__typename"] == "LiveStream":
+                    yield self._model(LiveStream, edge["node"])
+
+    async def stream_for_you(self, first: int = 20) -> AsyncIterator[LiveStream]:
+        """Get the lives in the For You feed, yielding each section's lives as
+        soon as the section is received"""
+        async for section in self._stream_edges(
+            "GetForYou", {"first": first, "after": None}
+        ):
+            for edge in section["node"]["contents"]["edges"]:
+                if edge["node"]["__typename"] == "LiveStream":
+                    yield self._model(LiveStream, edge["node"])
+
+    """Pagination"""
+
+    async def _paginate(
+        self,
+        query: str,
+        variables: dict,
+        connection: Callable[[dict], dict],
+        page_size: int,
+        prefetch: bool = False,
+    ) -> AsyncIterator[dict]:
+        """Yield the nodes of a connection, following its cursor page by page
+
+        With `prefetch`, the next page is requested while the caller is
+        still consuming the current one
+        """
+        variables = {**variables, "first": page_size, "after": None}
+        page = asyncio.ensure_future(self._req(query, variables))
+
+        try:
+            while page:
+                result = connection(await page)
+                page = None
+
+                has_next = result["pageInfo"]["hasNextPage"]
+                if has_next:
+                    variables = {**variables, "after": result["pageInfo"]["endCursor"]}
+
+                    if prefetch:
+                        page = asyncio.ensure_future(self._req(query, variables))
+
+                for edge in result["edges"]:
+                    yield edge["node"]
+
+                if has_next and not prefetch:
+                    page = asyncio.ensure_future(self._req(query, variables))
+        finally:
+            if page:
+                page.cancel()
+
+    """Streaming"""
+
+    async def _stream_edges(
+        self, query: str, variables: Optional[dict] = None
+    ) -> AsyncIterator[dict]:
+        """Make a request and yield the edges of its first connection as they
+        are received, bypassing the GQL client's buffered decoding
+
+        Expired tokens are refreshed, and the rate limiter (including 429/503
+        backoff) and request hooks apply as for other requests. The retry
+        policy doesn't, since edges may already have been handled when the
+        response fails.
+        """
+        await self._refresh_expired()
+        await self._connect()
+
+        if query in queries.OPERATIONS:
+            operation = query
+        else:
+            operation = queries.operation_name(queries.parse(query))
+
+        body = {"query": queries.OPERATIONS.get(query, query), "variables": variables}
+
+        attempt = 0
+        while True:
+            try:
+                resp, info = await self._open_stream(body, operation, attempt)
+                break
+            except TransportServerError as e:
+                if not (
+                    self.rate_limiter
+                    and e.code in RETRY_STATUSES
+                    and attempt < self.rate_limiter.max_retries
+                ):
+                    raise
+
+                self.rate_limiter.backoff(attempt, retry_after(e))
+                attempt += 1
+
+        try:
+            async for edge in iter_edges(resp.content.iter_chunked(STREAM_CHUNK_SIZE)):
+                yield edge
+        except GeneratorExit:
+            # Stopped early by the caller
+            self._end_request(info)
+            raise
+        except BaseException as e:
+            self._end_request(info, e)
+            raise
+        else:
+            self._end_request(info)
+        finally:
+            resp.release()
+
+    async def _open_stream(
+        self, body: dict, operation: Optional[str], attempt: int
+    ) -> Tuple[aiohttp.ClientResponse, Optional[RequestInfo]]:
+        """Send a streamed request, returning the response once its status is
+        known to be OK"""
+        info = None
+
+        if self.hooks:
+            info = RequestInfo(
+                operation,
+                len(json.dumps(body["variables"])) if body["variables"] else 0,
+                attempt,
+            )
+
+            for hook in self.hooks:
+                hook.on_request_start(info)
+
+        token = current_request.set(info)
+
+        try:
+            if self.rate_limiter:
+                if info:
+                    info.begin("queue")
+                await self.rate_limiter.acquire()
+                if info:
+                    info.end("queue")
+
+            resp = await self.session.post(self.gql_url, json=body)
+
+            try:
+                if resp.status >= 400:
+                    await self._raise_for_status(resp)
+            except BaseException:
+                resp.release()
+                raise
+        except BaseException as e:
+            self._end_request(info, e)
+            raise
+        finally:
+            current_request.reset(token)
+
+        return resp, info
+
+    async def _raise_for_status(self, resp: aiohttp.ClientResponse) -> None:
+        """Raise the GraphQL errors of a failed response, or its status"""
+        try:
+            result = self.codec.loads(await resp.read())
+        except Exception:
+            result = None
+
+        if isinstance(result, dict) and result.get("errors"):
+            raise TransportQueryError(
+                str(result["errors"][0]),
+                errors=result["errors"],
+                data=result.get("data"),
+            )
+
+        try:
+            resp.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            raise TransportServerError(str(e), e.status) from e
+
+    def _end_request(
+        self, info: Optional[RequestInfo], error: Optional[BaseException] = None
+    ) -> None:
+        """Report the end of a request to the request hooks"""
+        if info is None:
+            return
+
+        info.finish(error)
+
+        for hook in self.hooks:
+            if error is None:
+                hook.on_request_end(info)
+            else:
+                hook.on_request_error(info, error)